@@ -3,10 +3,30 @@ Flask Web Application for Bijoy Dibosh Poetry Generator
 Provides a simple web interface for generating poems
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
+import json
 import logging
+import os
+import threading
+from contextlib import nullcontext
 from poetry_generator import BijoyPoetryGenerator
+from batching import MicroBatchScheduler
+from cache_backends import create_result_cache
+from poem_pool import PoemPool
+from catalog import PoemCatalog
+from jobs import JobManager
+from inference_server import InferenceServerBusy, RemoteGenerator
+from validation import (
+    ValidationError,
+    validate_batch_seed,
+    validate_deadline,
+    validate_generate_request,
+    validate_item,
+    validate_items,
+    validate_profile,
+    validate_stream_request
+)
 import config
 
 # Setup Flask app
@@ -23,15 +43,215 @@ generators = {
     'bengali': None
 }
 
+generators_lock = threading.Lock()
+
+# Result cache shared by both generators (and, with the sqlite/redis
+# backends, by every worker and host)
+result_cache = create_result_cache()
+
 
 def get_generator(language: str) -> BijoyPoetryGenerator:
-    """Get or create a generator for the specified language"""
-    if generators[language] is None:
-        logger.info(f"Initializing {language} generator")
-        generators[language] = BijoyPoetryGenerator(language=language)
+    """Get or create a generator for the specified language (thread-safe)"""
+    if generators[language] is not None:
+        return generators[language]
+    
+    with generators_lock:
+        if generators[language] is not None:
+            return generators[language]  # Created by another thread while we waited
+        if config.INFERENCE_SERVER_CONFIG["address"]:
+            logger.info(f"Using inference server for {language}")
+            generators[language] = RemoteGenerator(language=language)
+        else:
+            logger.info(f"Initializing {language} generator")
+            generators[language] = BijoyPoetryGenerator(language=language, result_cache=result_cache)
     return generators[language]
 
 
+# Readiness for /ready: models loaded and warmed up per config.PRELOAD_CONFIG
+readiness = {'ready': False, 'mode': config.PRELOAD_CONFIG['mode'], 'languages': {}, 'error': None}
+
+
+def preload_models():
+    """Load and warm up the configured languages, then mark the app ready"""
+    try:
+        for language in config.PRELOAD_CONFIG['languages']:
+            readiness['languages'][language] = get_generator(language).warm_up()
+        readiness['ready'] = True
+    except Exception as e:
+        logger.error(f"Model preload failed: {e}")
+        readiness['error'] = str(e)
+
+
+# Background preloading starts on the first request (typically the load
+# balancer's first /ready probe), in the serving process: a thread started
+# at import would run in a gunicorn --preload master and never mark the
+# forked workers ready
+preload_pid = None
+preload_lock = threading.Lock()
+
+
+def start_preload():
+    """Start the background preload thread in this process (no-op once started)"""
+    global preload_pid
+    if readiness['mode'] != 'background' or preload_pid == os.getpid():
+        return
+    with preload_lock:
+        if preload_pid == os.getpid() or readiness['ready']:
+            return
+        preload_pid = os.getpid()
+        threading.Thread(target=preload_models, name="model-preload", daemon=True).start()
+
+
+if readiness['mode'] == 'blocking':
+    preload_models()
+elif readiness['mode'] != 'background':
+    readiness['ready'] = True  # Lazy loading: nothing to wait for
+
+# Cross-request batching of /api/generate calls (optional)
+scheduler = MicroBatchScheduler(get_generator) if config.BATCHING_CONFIG["enabled"] else None
+
+# Static tier of pre-rendered poems (optional)
+poem_catalog = None
+if config.CATALOG_CONFIG["path"]:
+    poem_catalog = PoemCatalog.load(config.CATALOG_CONFIG["path"])
+
+# Background-filled pool of ready-made poems for the standard themes
+# (optional); its refill thread starts on the first request, so it runs in
+# the serving process rather than a gunicorn --preload master
+poem_pool = None
+if config.POOL_CONFIG["enabled"]:
+    poem_pool = PoemPool(get_generator)
+
+
+@app.before_request
+def start_background_threads():
+    """Start model preloading and the poem pool's refill thread in this process (no-op once running)"""
+    start_preload()
+    if poem_pool is not None:
+        poem_pool.start()
+
+
+def inline_generation():
+    """Mark a generation outside the pool so pool refills back off (no-op without a pool)"""
+    return poem_pool.inline() if poem_pool is not None else nullcontext()
+
+
+# Background workers for /api/jobs (threads start on the first job); job
+# state goes through the result cache so any worker can report on it
+job_manager = JobManager(get_generator, inline=inline_generation, store=result_cache)
+
+
+def generate_poems(params: dict) -> list:
+    """
+    Serve one validated /api/generate request
+    
+    Unseeded default-profile requests can be served from the pre-rendered
+    catalog, then the poem pool; everything else is generated inline
+    (through the micro-batching scheduler when enabled and unseeded).
+    Seeded requests are served from the result cache when possible.
+    """
+    theme = params['theme']
+    language = params['language']
+    num_outputs = params['num_outputs']
+    profile = params['profile']
+    seed = params['seed']
+    
+    poems = None
+    ready_made = seed is None and profile == config.DEFAULT_GENERATION_PROFILE
+    pooled = poem_pool is not None and ready_made
+    if ready_made and (poem_catalog is not None or pooled):
+        normalized_theme = get_generator(language)._normalize_theme(theme)
+        if poem_catalog is not None:
+            poems = poem_catalog.sample(language, normalized_theme, num_outputs)
+        if poems is None and pooled:
+            poems = poem_pool.take(language, normalized_theme, num_outputs)
+    
+    if poems is None:
+        with inline_generation():
+            if scheduler is not None and seed is None:
+                poems = scheduler.generate(language, theme, num_outputs, profile, params['deadline_ms'])
+            else:
+                generator = get_generator(language)
+                poems = generator.generate(
+                    theme=theme,
+                    num_outputs=num_outputs,
+                    profile=profile,
+                    deadline_ms=params['deadline_ms'],
+                    seed=seed
+                )
+    return poems
+
+
+def generate_batch(items: list, profile: str, deadline_ms=None, seed=None) -> list:
+    """
+    Serve an /api/generate/batch request: per-item results or errors, in order
+    
+    Items are validated one by one, so one bad item doesn't fail the whole
+    batch, and valid items run as one batched generate_many() call per
+    language. The batch-level seed makes that call reproducible; items with
+    their own seed each cost a separate model call.
+    """
+    results = [None] * len(items)
+    by_language = {}
+    for index, item in enumerate(items):
+        try:
+            item = validate_item(item)
+        except ValidationError as e:
+            results[index] = {'index': index, 'success': False, 'error': str(e)}
+            continue
+        by_language.setdefault(item['language'], []).append((index, item))
+    
+    max_outputs = config.BATCH_API_CONFIG['max_total_outputs']
+    total_outputs = sum(item['num_outputs'] for group in by_language.values() for _, item in group)
+    if total_outputs > max_outputs:
+        raise ValidationError(f'At most {max_outputs} poems per batch')
+    
+    with inline_generation():
+        for language, group in by_language.items():
+            try:
+                generator = get_generator(language)
+                poems = generator.generate_many([item for _, item in group], profile, deadline_ms, seed)
+            except Exception as e:
+                logger.error(f"Error generating {language} batch: {e}")
+                for index, _ in group:
+                    results[index] = {'index': index, 'success': False, 'error': str(e)}
+                continue
+            for (index, item), item_poems in zip(group, poems):
+                results[index] = {'index': index, 'success': True, 'poems': item_poems, **item}
+    return results
+
+
+def create_job_from(data: dict):
+    """Validate an /api/jobs body and queue it (None if the job queue is full)"""
+    items = validate_items(data, config.JOBS_CONFIG['max_items'], 'job')
+    profile = validate_profile(data)
+    
+    # Jobs are all-or-nothing on validation, so they can't fail halfway on bad input
+    validated = []
+    for index, item in enumerate(items):
+        try:
+            validated.append(validate_item(item))
+        except ValidationError as e:
+            raise ValidationError(f'Item {index}: {e}')
+    
+    return job_manager.submit(validated, profile)
+
+
+def collect_stats() -> dict:
+    """Generation path counters and cache, pool, catalog and job stats"""
+    return {
+        'success': True,
+        'generators': {
+            language: generator.get_stats()
+            for language, generator in generators.items()
+            if generator is not None
+        },
+        'pool': poem_pool.stats() if poem_pool is not None else None,
+        'catalog': poem_catalog.stats() if poem_catalog is not None else None,
+        'jobs': job_manager.stats()
+    }
+
+
 @app.route('/')
 def index():
     """Render the main page"""
@@ -42,48 +262,119 @@ def index():
 def generate_poem():
     """API endpoint to generate a poem"""
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-        
-        # Validate input
-        theme = data.get('theme', '').strip()
-        if not theme:
-            return jsonify({'error': 'Theme is required'}), 400
-        
-        language = data.get('language', 'english').lower()
-        if language not in ['english', 'bengali']:
-            return jsonify({'error': 'Invalid language'}), 400
-        
-        num_outputs = int(data.get('num_outputs', 1))
-        if num_outputs < 1 or num_outputs > 5:
-            return jsonify({'error': 'num_outputs must be between 1 and 5'}), 400
-        
-        # Generate poems
-        generator = get_generator(language)
-        poems = generator.generate(
-            theme=theme,
-            num_outputs=num_outputs
-        )
+        params = validate_generate_request(request.get_json())
+        poems = generate_poems(params)
         
         return jsonify({
             'success': True,
             'poems': poems,
-            'theme': theme,
-            'language': language
+            'theme': params['theme'],
+            'language': params['language'],
+            'profile': params['profile'],
+            'seed': params['seed']
         })
-        
+    
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except InferenceServerBusy as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         logger.error(f"Error generating poem: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/generate/batch', methods=['POST'])
+def generate_poem_batch():
+    """API endpoint to generate poems for many (theme, language) items at once"""
+    try:
+        data = request.get_json()
+        items = validate_items(data, config.BATCH_API_CONFIG['max_items'])
+        profile = validate_profile(data)
+        seed = validate_batch_seed(data)
+        results = generate_batch(items, profile, validate_deadline(data), seed)
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'profile': profile,
+            'seed': seed
+        })
+    
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error generating poem batch: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """API endpoint to queue a large generation run as a background job"""
+    try:
+        job = create_job_from(request.get_json())
+        if job is None:
+            return jsonify({'error': 'Job queue is full, try again later'}), 503
+        
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/jobs/{job.id}'
+        }), 202
+    
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error creating job: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """API endpoint to get a job's status and results so far"""
+    status = job_manager.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify({'success': True, **status})
+
+
+@app.route('/api/generate/stream', methods=['GET', 'POST'])
+def generate_poem_stream():
+    """API endpoint to stream a poem line by line as Server-Sent Events"""
+    # Accept a JSON body or query parameters (EventSource can only GET)
+    try:
+        params = validate_stream_request(request.get_json(silent=True) or request.args)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    generator = get_generator(params['language'])
+    
+    def events():
+        try:
+            with inline_generation():
+                lines = generator.generate_stream(theme=params['theme'], profile=params['profile'])
+                for index, line in enumerate(lines, 1):
+                    payload = json.dumps({'index': index, 'line': line}, ensure_ascii=False)
+                    yield f"event: line\ndata: {payload}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming poem: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/slogan', methods=['GET'])
 def get_slogan():
     """API endpoint to get a random slogan"""
     try:
+        seed = request.args.get('seed', type=int)
         generator = get_generator('english')
-        slogan = generator.get_random_slogan()
+        slogan = generator.get_random_slogan(seed=seed)
         return jsonify({
             'success': True,
             'slogan': slogan
@@ -108,12 +399,33 @@ def get_themes():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """API endpoint to get generation path counters and cache stats"""
+    return jsonify(collect_stats())
+
+
+@app.route('/api/pool', methods=['GET'])
+def get_pool():
+    """API endpoint to get ready poems per (language, theme) pool"""
+    if poem_pool is None:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({'success': True, 'enabled': True, **poem_pool.stats()})
+
+
 @app.route('/health')
 def health():
-    """Health check endpoint"""
+    """Health check endpoint (liveness: the process is up)"""
     return jsonify({'status': 'ok'})
 
 
+@app.route('/ready')
+def ready():
+    """Readiness endpoint: 503 until preloaded models are warmed up"""
+    status = 200 if readiness['ready'] else 503
+    return jsonify({'status': 'ready' if readiness['ready'] else 'loading', **readiness}), status
+
+
 if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,299 @@
+"""
+ASGI entry point for the Bijoy Dibosh Poetry Generator
+The generation endpoints are served here, with model calls on a bounded
+thread pool, so a slow generation never blocks other requests. Every other
+route (health, themes, slogans, stats, jobs, CORS preflight) is answered by
+the Flask app itself on the default executor, so both entry points share
+one route table.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Shares generators, caches, pool, catalog and job queue with app.py.
+"""
+
+import asyncio
+import io
+import json
+import sys
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+import config
+import app as flask_app
+from inference_server import InferenceServerBusy
+from validation import (
+    ValidationError,
+    validate_batch_seed,
+    validate_deadline,
+    validate_generate_request,
+    validate_items,
+    validate_profile,
+    validate_stream_request
+)
+
+logger = logging.getLogger(__name__)
+
+# Model calls run here; at most workers at once, max_queued more waiting
+executor = ThreadPoolExecutor(
+    max_workers=config.ASGI_CONFIG["workers"],
+    thread_name_prefix="asgi-generate"
+)
+_max_in_flight = config.ASGI_CONFIG["workers"] + config.ASGI_CONFIG["max_queued"]
+_in_flight = 0
+
+
+class Busy(Exception):
+    """Too many model calls already running or waiting"""
+
+
+def reserve():
+    """Claim an executor slot, refusing work beyond the limit"""
+    global _in_flight
+    if _in_flight >= _max_in_flight:
+        raise Busy("Too many generation requests in progress, try again later")
+    _in_flight += 1  # Only touched on the event loop thread, so no lock
+
+
+def release(*_):
+    """Give back a slot claimed with reserve()"""
+    global _in_flight
+    _in_flight -= 1
+
+
+async def offload(func, *args):
+    """Run a blocking model call on the executor, refusing work beyond the limit"""
+    reserve()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    finally:
+        release()
+
+
+async def read_body(receive) -> bytes:
+    """Read a whole request body"""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def read_json(receive):
+    """Read and parse a JSON request body (None if empty or invalid)"""
+    body = await read_body(receive)
+    try:
+        return json.loads(body) if body else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+async def send_json(send, payload, status: int = 200):
+    """Send a JSON response"""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json; charset=utf-8"),
+            (b"access-control-allow-origin", b"*")
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def wsgi_environ(scope, body: bytes) -> dict:
+    """Build a WSGI environ for the Flask app from an ASGI HTTP scope"""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = f"HTTP_{key}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    environ["CONTENT_LENGTH"] = str(len(body))  # The body is already read (chunked requests have no header)
+    return environ
+
+
+def call_flask(environ: dict):
+    """Run one request through the Flask app; returns (status, headers, body)"""
+    response = {}
+    
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = headers
+    
+    chunks = flask_app.app(environ, start_response)
+    try:
+        body = b"".join(chunks)
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+    return response["status"], response["headers"], body
+
+
+async def delegate(scope, receive, send):
+    """Answer a request with the Flask app, run on the default executor"""
+    environ = wsgi_environ(scope, await read_body(receive))
+    status, headers, body = await asyncio.get_running_loop().run_in_executor(None, call_flask, environ)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def stream_events(send, params):
+    """
+    Stream a poem as Server-Sent Events
+    
+    The whole stream runs on one executor slot, claimed before the response
+    starts (so a full executor is a clean 503) and held until generation
+    has stopped, which keeps streamed generations within the limit.
+    """
+    reserve()
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    stop = threading.Event()
+    
+    def produce():
+        """Pull the poem's lines on the executor and hand them to the event loop"""
+        try:
+            generator = flask_app.get_generator(params["language"])
+            with flask_app.inline_generation():
+                lines = generator.generate_stream(theme=params["theme"], profile=params["profile"])
+                try:
+                    for line in lines:
+                        if stop.is_set():
+                            return  # Client went away
+                        loop.call_soon_threadsafe(events.put_nowait, ("line", line))
+                finally:
+                    lines.close()  # Stops the generation thread
+            loop.call_soon_threadsafe(events.put_nowait, ("done", None))
+        except Exception as e:
+            logger.error(f"Error streaming poem: {e}")
+            loop.call_soon_threadsafe(events.put_nowait, ("error", str(e)))
+    
+    try:
+        producer = loop.run_in_executor(executor, produce)
+    except BaseException:
+        release()
+        raise
+    producer.add_done_callback(release)
+    
+    async def event(name, payload):
+        data = json.dumps(payload, ensure_ascii=False)
+        await send({
+            "type": "http.response.body",
+            "body": f"event: {name}\ndata: {data}\n\n".encode("utf-8"),
+            "more_body": True
+        })
+    
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+                (b"access-control-allow-origin", b"*")
+            ]
+        })
+        index = 0
+        while True:
+            kind, value = await events.get()
+            if kind == "line":
+                index += 1
+                await event("line", {"index": index, "line": value})
+            elif kind == "done":
+                await event("done", {})
+                break
+            else:
+                await event("error", {"error": value})
+                break
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        stop.set()
+
+
+async def handle(scope, receive, send):
+    """Serve the generation routes here; hand every other request to the Flask app"""
+    method = scope["method"]
+    path = scope["path"].rstrip("/") or "/"
+    query = dict(parse_qsl(scope.get("query_string", b"").decode("utf-8")))
+    flask_app.start_background_threads()
+    
+    # Model calls, offloaded to the bounded executor
+    if method == "POST" and path == "/api/generate":
+        params = validate_generate_request(await read_json(receive))
+        poems = await offload(flask_app.generate_poems, params)
+        return await send_json(send, {
+            "success": True,
+            "poems": poems,
+            "theme": params["theme"],
+            "language": params["language"],
+            "profile": params["profile"],
+            "seed": params["seed"]
+        })
+    
+    if method == "POST" and path == "/api/generate/batch":
+        data = await read_json(receive)
+        items = validate_items(data, config.BATCH_API_CONFIG["max_items"])
+        profile = validate_profile(data)
+        seed = validate_batch_seed(data)
+        results = await offload(flask_app.generate_batch, items, profile, validate_deadline(data), seed)
+        return await send_json(send, {"success": True, "results": results, "profile": profile, "seed": seed})
+    
+    if method in ("GET", "POST") and path == "/api/generate/stream":
+        data = (await read_json(receive) if method == "POST" else None) or query
+        return await stream_events(send, validate_stream_request(data))
+    
+    # Everything else (cheap endpoints, jobs, CORS preflight) is the Flask app's
+    return await delegate(scope, receive, send)
+
+
+async def app(scope, receive, send):
+    """ASGI application"""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    
+    if scope["type"] != "http":
+        return
+    
+    try:
+        await handle(scope, receive, send)
+    except ValidationError as e:
+        await send_json(send, {"error": str(e)}, 400)
+    except (Busy, InferenceServerBusy) as e:
+        await send_json(send, {"error": str(e)}, 503)
+    except Exception as e:
+        logger.error(f"Error handling {scope['path']}: {e}")
+        await send_json(send, {"error": str(e)}, 500)
@@ -0,0 +1,308 @@
+"""
+Inference backends for the Bijoy Dibosh Poetry Generator
+Each backend loads a model exposing transformers' generate() API, so the
+generator's batching, stopping criteria and streaming work unchanged;
+selected per language with MODEL_CONFIG[language]["backend"]
+"""
+
+import os
+import json
+import mmap
+import struct
+import logging
+import importlib.util
+from typing import Dict, List
+import config
+
+logger = logging.getLogger(__name__)
+
+# safetensors dtype names -> torch dtype attribute names
+SAFETENSORS_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+
+def _safetensors_files(model_name: str) -> List[str]:
+    """Local paths of a model's safetensors checkpoint files (empty if it has none)"""
+    from transformers.utils import cached_file
+    
+    path = cached_file(model_name, "model.safetensors", _raise_exceptions_for_missing_entries=False)
+    if path is not None:
+        return [path]
+    
+    index = cached_file(model_name, "model.safetensors.index.json", _raise_exceptions_for_missing_entries=False)
+    if index is None:
+        return []
+    with open(index, "r", encoding="utf-8") as f:
+        shards = sorted(set(json.load(f)["weight_map"].values()))
+    return [cached_file(model_name, shard) for shard in shards]
+
+
+def _map_safetensors(path: str) -> Dict:
+    """
+    Tensors of a safetensors file, backed by a copy-on-write mmap of it
+    
+    Nothing is read up front: pages come from the page cache on first
+    touch and are shared with every other process mapping the file.
+    """
+    import torch
+    
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    header_size = struct.unpack("<Q", mapped[:8])[0]
+    header = json.loads(mapped[8:8 + header_size])
+    data_start = 8 + header_size
+    
+    tensors = {}
+    for name, info in header.items():
+        dtype = getattr(torch, SAFETENSORS_DTYPES.get(info.get("dtype"), ""), None) if name != "__metadata__" else None
+        start, end = info["data_offsets"] if dtype is not None else (0, 0)
+        if end <= start:
+            continue
+        count = (end - start) // torch.tensor([], dtype=dtype).element_size()
+        tensors[name] = torch.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + start).view(info["shape"])
+    return tensors
+
+
+class InferenceBackend:
+    """
+    Interface for inference backends
+    
+    load() is called once per generator, after torch and transformers have
+    been imported, and returns the model (or None for template-only).
+    """
+    
+    name = "base"
+    enabled = True              # False: never load a model, templates only
+    reuses_kv_cache = False     # Whether the prefix/encoder caches can be used
+    assisted_decoding = False   # Whether a draft model can assist generate()
+    static_shapes = False       # Whether batches should be padded to fixed bucket lengths
+    
+    def available(self) -> bool:
+        """Whether the backend's optional dependencies are installed"""
+        return True
+    
+    def load(self, model_name: str, is_seq2seq: bool, device: str):
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """
+    Plain PyTorch transformers models (config.MODEL_LOADING_CONFIG applies)
+    
+    With MODEL_MMAP=True, weights are re-pointed at a copy-on-write mmap of
+    the safetensors checkpoint after loading, so they live in the page cache
+    and processes on a host loading the same checkpoint share one copy.
+    Otherwise they are copied into process memory (recent transformers
+    versions leave them mapped), so replacing the checkpoint file can't
+    crash a running process.
+    """
+    
+    name = "torch"
+    reuses_kv_cache = True
+    assisted_decoding = True
+    
+    def load(self, model_name: str, is_seq2seq: bool, device: str):
+        from transformers import AutoModelForCausalLM, AutoModelForSeq2SeqLM
+        
+        model_class = AutoModelForSeq2SeqLM if is_seq2seq else AutoModelForCausalLM
+        model = model_class.from_pretrained(
+            model_name,
+            trust_remote_code=True,
+            **self._loading_kwargs(device)
+        ).to(device)
+        
+        settings = config.MODEL_LOADING_CONFIG
+        if settings["quantize"] == "int8":
+            model = self._quantize_int8(model, device)
+        elif settings["mmap"]:
+            self._mmap_weights(model, model_name, device)
+        else:
+            for param in model.parameters():
+                param.data = param.data.clone()
+        return model
+    
+    def _loading_kwargs(self, device: str) -> Dict:
+        """from_pretrained keyword arguments from config.MODEL_LOADING_CONFIG"""
+        import torch
+        import transformers
+        
+        settings = config.MODEL_LOADING_CONFIG
+        kwargs = {}
+        
+        dtype = settings["dtype"]
+        if dtype not in ("float32", "bfloat16", "float16"):
+            raise ValueError(f"Unknown MODEL_DTYPE: {dtype}")
+        if dtype == "float16" and device == "cpu":
+            logger.warning("float16 is slow or unsupported on CPU, loading float32")
+            dtype = "float32"
+        if settings["quantize"] == "int8" and dtype != "float32":
+            logger.warning("int8 quantization needs float32 weights, ignoring MODEL_DTYPE")
+            dtype = "float32"
+        
+        # transformers renamed torch_dtype to dtype in 4.56
+        major, minor = (int(part) for part in transformers.__version__.split(".")[:2])
+        kwargs["dtype" if (major, minor) >= (4, 56) else "torch_dtype"] = getattr(torch, dtype)
+        return kwargs
+    
+    def _mmap_weights(self, model, model_name: str, device: str):
+        """
+        Swap the model's parameters for mmap-backed checkpoint tensors
+        
+        Parameters are matched by name, with or without the model's
+        base_model_prefix (checkpoints are saved either way); those whose
+        dtype or shape differ from the checkpoint (e.g. a bfloat16 load of
+        a float32 file) keep their loaded copy.
+        """
+        if device != "cpu":
+            logger.warning("MODEL_MMAP only applies on CPU, skipping")
+            return
+        paths = _safetensors_files(model_name)
+        if not paths:
+            logger.warning(f"{model_name} has no safetensors checkpoint, MODEL_MMAP skipped")
+            return
+        
+        tensors = {}
+        for path in paths:
+            tensors.update(_map_safetensors(path))
+        
+        prefix = getattr(model, "base_model_prefix", "")
+        mapped = skipped = 0
+        for name, param in model.named_parameters():
+            candidates = [name]
+            if prefix and name.startswith(prefix + "."):
+                candidates.append(name[len(prefix) + 1:])
+            elif prefix:
+                candidates.append(f"{prefix}.{name}")
+            source = next((tensors[key] for key in candidates if key in tensors), None)
+            if source is None or source.dtype != param.dtype or source.shape != param.shape:
+                skipped += 1
+                continue
+            param.data = source
+            mapped += 1
+        logger.info(f"Memory-mapped {mapped} parameter(s) from the checkpoint ({skipped} kept in memory)")
+    
+    def _quantize_int8(self, model, device: str):
+        """
+        Apply dynamic int8 quantization to the model's linear layers (CPU only)
+        
+        GPT-2 style models use transformers' Conv1D instead of nn.Linear,
+        which quantize_dynamic skips, so those layers are converted to
+        equivalent nn.Linear layers first. The output projection is left in
+        float32 when it is tied to the input embeddings, since quantizing it
+        would untie it and add a second copy of the embedding matrix.
+        """
+        import torch
+        
+        if device != "cpu":
+            logger.warning("int8 dynamic quantization is CPU-only, skipping")
+            return model
+        
+        nn = torch.nn
+        for parent in list(model.modules()):
+            for name, child in list(parent.named_children()):
+                if type(child).__name__ == "Conv1D":
+                    linear = nn.Linear(child.weight.shape[0], child.weight.shape[1])
+                    linear.weight = nn.Parameter(child.weight.detach().t().contiguous())
+                    linear.bias = nn.Parameter(child.bias.detach())
+                    setattr(parent, name, linear)
+        
+        output_embeddings = model.get_output_embeddings()
+        input_embeddings = model.get_input_embeddings()
+        tied = (
+            output_embeddings is not None and input_embeddings is not None
+            and output_embeddings.weight.data_ptr() == input_embeddings.weight.data_ptr()
+        )
+        qconfig = torch.ao.quantization.default_dynamic_qconfig
+        qconfig_spec = {
+            name: qconfig
+            for name, module in model.named_modules()
+            if isinstance(module, nn.Linear) and not (tied and module is output_embeddings)
+        }
+        
+        quantized = torch.ao.quantization.quantize_dynamic(model, qconfig_spec, dtype=torch.qint8, inplace=True)
+        logger.info(f"Quantized {len(qconfig_spec)} linear layer(s) to int8")
+        return quantized
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    ONNX Runtime graphs on CPU via optimum.onnxruntime (optional dependency)
+    
+    The model is exported to ONNX on first use and saved under
+    config.ONNX_CONFIG["export_dir"], so later loads skip the export. The
+    ORT models' cached states can't be seeded from outside, so the prefix
+    and encoder caches are bypassed.
+    """
+    
+    name = "onnx"
+    static_shapes = True
+    
+    def available(self) -> bool:
+        try:
+            return importlib.util.find_spec("optimum.onnxruntime") is not None
+        except ImportError:
+            return False  # optimum itself is missing
+    
+    def load(self, model_name: str, is_seq2seq: bool, device: str):
+        from optimum.onnxruntime import ORTModelForCausalLM, ORTModelForSeq2SeqLM
+        
+        if device != "cpu":
+            logger.warning("ONNX backend runs on CPU only")
+        
+        model_class = ORTModelForSeq2SeqLM if is_seq2seq else ORTModelForCausalLM
+        export_dir = os.path.join(config.ONNX_CONFIG["export_dir"], model_name.strip("/").replace("/", "--"))
+        if os.path.exists(os.path.join(export_dir, "config.json")):
+            return model_class.from_pretrained(export_dir, provider=config.ONNX_CONFIG["provider"])
+        
+        logger.info(f"Exporting {model_name} to ONNX (one-off) in {export_dir}")
+        model = model_class.from_pretrained(
+            model_name,
+            export=True,
+            provider=config.ONNX_CONFIG["provider"]
+        )
+        model.save_pretrained(export_dir)
+        return model
+
+
+class TemplateBackend(InferenceBackend):
+    """No model: every poem comes from the template engine"""
+    
+    name = "template"
+    enabled = False
+    
+    def load(self, model_name: str, is_seq2seq: bool, device: str):
+        return None
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxBackend,
+    "template": TemplateBackend,
+}
+
+
+def get_backend(name: str) -> InferenceBackend:
+    """
+    Create the backend registered under name
+    
+    Falls back to the torch backend when the requested one's optional
+    dependencies are missing, so the returned backend (its name, cache and
+    padding flags) always describes the model that actually gets loaded.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}' (choose from: {', '.join(BACKENDS)})")
+    backend = BACKENDS[name]()
+    if not backend.available():
+        logger.warning(f"{name} backend dependencies not installed, using the torch backend")
+        return TorchBackend()
+    return backend
@@ -0,0 +1,146 @@
+"""
+Cross-request micro-batching for the Bijoy Dibosh Poetry Generator
+Collects concurrent generation requests per language for a short window
+and dispatches them to the model as a single batched call
+"""
+
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchScheduler:
+    """
+    Groups concurrent poem requests into batched generate_many() calls
+    
+    Each (language, generation profile) pair gets its own queue and
+    dispatcher thread, since a batch shares one model call. A dispatcher
+    takes the first waiting request, keeps collecting until the batch holds
+    max_batch_size poems or max_wait_ms has passed, then runs the whole
+    batch through the generator and resolves every waiting request.
+    """
+    
+    def __init__(
+        self,
+        get_generator: Callable,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[int] = None
+    ):
+        """
+        Initialize the scheduler
+        
+        Args:
+            get_generator: Callable returning the generator for a language
+            max_batch_size: Max poems per model call (default: from config)
+            max_wait_ms: Max time to hold a batch open (default: from config)
+        """
+        self._get_generator = get_generator
+        self.max_batch_size = max_batch_size or config.BATCHING_CONFIG["max_batch_size"]
+        if max_wait_ms is None:
+            max_wait_ms = config.BATCHING_CONFIG["max_wait_ms"]
+        self.max_wait = max_wait_ms / 1000.0
+        self._queues = {}
+        self._lock = threading.Lock()
+    
+    def submit(
+        self,
+        language: str,
+        theme: str,
+        num_outputs: int = 1,
+        profile: Optional[str] = None,
+        deadline_ms: Optional[float] = None
+    ) -> Future:
+        """Queue a request and return a Future resolving to its poems"""
+        future = Future()
+        item = {"theme": theme, "num_outputs": num_outputs}
+        if deadline_ms is not None:
+            item["deadline"] = time.monotonic() + deadline_ms / 1000.0
+        self._get_queue(language, profile).put((item, future))
+        return future
+    
+    def generate(
+        self,
+        language: str,
+        theme: str,
+        num_outputs: int = 1,
+        profile: Optional[str] = None,
+        deadline_ms: Optional[float] = None,
+        timeout: Optional[float] = None
+    ) -> List[str]:
+        """Queue a request and block until its poems are ready"""
+        future = self.submit(language, theme, num_outputs, profile, deadline_ms)
+        return future.result(timeout=timeout)
+    
+    def _get_queue(self, language: str, profile: Optional[str]) -> queue.Queue:
+        """Get the queue for a language/profile, starting its dispatcher on first use"""
+        key = (language, profile)
+        with self._lock:
+            if key not in self._queues:
+                self._queues[key] = queue.Queue()
+                worker = threading.Thread(
+                    target=self._run,
+                    args=(language, profile, self._queues[key]),
+                    name=f"batch-dispatcher-{language}-{profile or 'default'}",
+                    daemon=True
+                )
+                worker.start()
+            return self._queues[key]
+    
+    def _run(self, language: str, profile: Optional[str], pending: queue.Queue):
+        """Dispatcher loop: collect a batch, run it, repeat"""
+        while True:
+            batch = [pending.get()]
+            size = batch[0][0]["num_outputs"]
+            deadline = time.monotonic() + self.max_wait
+            
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(entry)
+                size += entry[0]["num_outputs"]
+            
+            self._dispatch(language, profile, batch)
+    
+    def _dispatch(self, language: str, profile: Optional[str], batch: List):
+        """
+        Run one batch through the generator and fan results back out
+        
+        Requests with a deadline share one call that has to meet the
+        tightest of them (time spent queued counts); requests without one
+        run in a separate call, so they never get a deadline fallback they
+        didn't ask for.
+        """
+        timed = [entry for entry in batch if "deadline" in entry[0]]
+        untimed = [entry for entry in batch if "deadline" not in entry[0]]
+        if timed:
+            deadline = min(item["deadline"] for item, _ in timed)
+            self._run_batch(language, profile, timed, max(0.0, deadline - time.monotonic()) * 1000)
+        if untimed:
+            self._run_batch(language, profile, untimed, None)
+    
+    def _run_batch(self, language: str, profile: Optional[str], batch: List, deadline_ms: Optional[float]):
+        """Run requests as one generate_many() call and resolve their futures"""
+        items = [item for item, _ in batch]
+        logger.info(f"Dispatching batch of {len(items)} {language} request(s)")
+        
+        try:
+            results = self._get_generator(language).generate_many(items, profile, deadline_ms)
+        except Exception as e:
+            logger.error(f"Batched generation failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        
+        for (_, future), poems in zip(batch, results):
+            future.set_result(poems)
@@ -0,0 +1,414 @@
+"""
+Performance benchmarks for the Bijoy Dibosh Poetry Generator
+Run `python benchmark.py --help` for the available benchmarks
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cold-start scenarios, each run in a fresh interpreter
+STARTUP_TARGETS = {
+    "import poetry_generator": "import poetry_generator",
+    "import app": "import app",             # Flask itself is imported untimed, see STARTUP_SETUP
+    "first template poem": (
+        "from poetry_generator import BijoyPoetryGenerator\n"
+        "BijoyPoetryGenerator(language='english').generate(theme='Freedom')"
+    ),
+    "cli --list-themes": (
+        "import generate_poetry, contextlib, io\n"
+        "sys.argv = ['generate_poetry.py', '--list-themes']\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    generate_poetry.main()"
+    ),
+}
+
+# Third-party imports done before the timer starts: Flask alone takes
+# ~100 ms to import, which no change to this project can reduce
+STARTUP_SETUP = {
+    "import app": "import flask, flask_cors",
+}
+
+STARTUP_PROBE = """
+import sys, time, json, resource, logging
+logging.disable(logging.CRITICAL)
+{setup}
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "torch_imported": "torch" in sys.modules
+}}))
+"""
+
+# Model loading modes, each measured in a fresh interpreter so RSS is per mode
+LOADING_MODES = {
+    "default": {"MODEL_MMAP": "False", "MODEL_DTYPE": "float32", "MODEL_QUANTIZE": "none"},
+    "mmap": {"MODEL_MMAP": "True", "MODEL_DTYPE": "float32", "MODEL_QUANTIZE": "none"},
+    "bf16": {"MODEL_MMAP": "False", "MODEL_DTYPE": "bfloat16", "MODEL_QUANTIZE": "none"},
+    "int8": {"MODEL_MMAP": "False", "MODEL_DTYPE": "float32", "MODEL_QUANTIZE": "int8"},
+}
+
+# Inference backends, selected for both languages (see backends.py)
+BACKEND_MODES = {
+    name: {"ENGLISH_BACKEND": name, "BENGALI_BACKEND": name}
+    for name in ("torch", "onnx", "template")
+}
+
+# Speculative decoding off vs. on (draft model from MODEL_CONFIG or --draft-model)
+SPECULATIVE_MODES = {
+    "off": {"SPECULATIVE_DECODING": "False"},
+    "draft": {"SPECULATIVE_DECODING": "True"},
+}
+
+LOADING_PROBE = """
+import json, os, resource, time, logging
+logging.disable(logging.CRITICAL)
+import poetry_generator
+from poetry_generator import BijoyPoetryGenerator
+
+def statm_kb():
+    # Resident and private (resident minus file-backed/shared) memory in KB
+    with open("/proc/self/statm") as f:
+        resident, shared = (int(field) for field in f.read().split()[1:3])
+    page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+    return resident * page_kb, (resident - shared) * page_kb
+
+poetry_generator._import_ml()
+if {threads}:
+    poetry_generator.torch.set_num_threads({threads})
+baseline, baseline_private = statm_kb()
+generator = BijoyPoetryGenerator(language={language!r}, use_gpu=False)
+start = time.perf_counter()
+generator._load_model()
+load_seconds = time.perf_counter() - start
+loaded, loaded_private = statm_kb()
+
+latencies = []
+if generator.model is not None or not generator.backend.enabled:
+    generator.generate(theme={theme!r}, profile={profile!r})  # Warm-up
+    for _ in range({poems}):
+        start = time.perf_counter()
+        generator.generate(theme={theme!r}, profile={profile!r})
+        latencies.append(time.perf_counter() - start)
+
+print(json.dumps({{
+    "model_loaded": generator.model is not None,
+    "backend": generator.backend.name,
+    "speculative": generator.get_stats()["speculative"],
+    "load_seconds": load_seconds,
+    "model_rss_kb": loaded - baseline,
+    "model_private_kb": loaded_private - baseline_private,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "latencies": latencies
+}}))
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_probe(code: str, env: dict) -> dict:
+    """Run a probe script in a fresh interpreter and parse its JSON report"""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "probe failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_startup(args) -> int:
+    """Measure cold-start import time and RSS for template-only serving"""
+    env = dict(os.environ, SKIP_MODEL_LOADING="1")
+    over_budget = False
+    
+    print(f"Startup benchmark ({args.runs} runs each, SKIP_MODEL_LOADING=1)")
+    print("-" * 78)
+    print(f"  {'scenario':24} {'median ms':>10} {'p95 ms':>10} {'wall ms':>10} {'RSS MB':>8}  torch")
+    
+    for name, code in STARTUP_TARGETS.items():
+        timings, walls, rss, torch_imported = [], [], [], False
+        try:
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                probe = STARTUP_PROBE.format(setup=STARTUP_SETUP.get(name, ""), code=code)
+                report = run_probe(probe, env)
+                walls.append(time.perf_counter() - start)
+                timings.append(report["seconds"])
+                rss.append(report["max_rss_kb"])
+                torch_imported = torch_imported or report["torch_imported"]
+        except RuntimeError as e:
+            print(f"  {name:24} skipped ({e})")
+            continue
+        
+        median_ms = statistics.median(timings) * 1000
+        print(
+            f"  {name:24} {median_ms:10.1f} {percentile(timings, 95) * 1000:10.1f}"
+            f" {statistics.median(walls) * 1000:10.1f} {max(rss) / 1024:8.1f}"
+            f"  {'yes' if torch_imported else 'no'}"
+        )
+        if median_ms > args.budget_ms or torch_imported:
+            over_budget = True
+    
+    print("-" * 78)
+    if over_budget:
+        print(f"✗ A scenario exceeded {args.budget_ms:.0f} ms or imported torch")
+        return 1
+    print(f"✓ All scenarios within {args.budget_ms:.0f} ms without importing torch")
+    return 0
+
+
+def benchmark_profiles(args) -> int:
+    """Measure per-request latency and throughput for each generation profile"""
+    os.environ.pop("SKIP_MODEL_LOADING", None)
+    import config
+    from poetry_generator import BijoyPoetryGenerator
+    
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    
+    generator = BijoyPoetryGenerator(language=args.language, use_gpu=False)
+    generator._load_model()
+    if generator.model is None:
+        print("ℹ No model loaded - timings reflect template-based generation only")
+    
+    profiles = args.profiles or list(config.GENERATION_PROFILES)
+    print(
+        f"Generation profile benchmark ({args.language}, {args.requests} requests"
+        f" x {args.num_outputs} poem(s), CPU)"
+    )
+    print("-" * 70)
+    print(f"  {'profile':10} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10} {'poems/s':>10}")
+    
+    for profile in profiles:
+        # Warm-up request so one-off costs don't skew the first profile
+        generator.generate(theme=args.theme, num_outputs=args.num_outputs, profile=profile)
+        
+        latencies = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            generator.generate(theme=args.theme, num_outputs=args.num_outputs, profile=profile)
+            latencies.append(time.perf_counter() - start)
+        
+        total = sum(latencies)
+        print(
+            f"  {profile:10} {percentile(latencies, 50) * 1000:10.1f}"
+            f" {percentile(latencies, 95) * 1000:10.1f}"
+            f" {statistics.mean(latencies) * 1000:10.1f}"
+            f" {args.requests * args.num_outputs / total:10.2f}"
+        )
+    
+    print("-" * 70)
+    return 0
+
+
+def probe_mode(overrides: dict, args) -> dict:
+    """Run LOADING_PROBE in a fresh interpreter with environment overrides"""
+    env = dict(os.environ, **overrides)
+    env.pop("SKIP_MODEL_LOADING", None)
+    code = LOADING_PROBE.format(
+        language=args.language,
+        theme=args.theme,
+        profile=args.profile,
+        poems=args.poems,
+        threads=args.threads or 0
+    )
+    return run_probe(code, env)
+
+
+def compare_modes(title: str, label: str, modes: dict, args) -> int:
+    """Run LOADING_PROBE once per mode (a dict of environment overrides) and print a table"""
+    selected = args.modes or list(modes)
+    unknown = [mode for mode in selected if mode not in modes]
+    if unknown:
+        print(f"✗ Unknown {label}(s): {', '.join(unknown)}")
+        return 2
+    
+    print(
+        f"{title} ({args.language}, {args.poems} poem(s) per {label},"
+        f" {args.profile} profile, CPU)"
+    )
+    print("-" * 89)
+    print(
+        f"  {label:8} {'load s':>8} {'model MB':>10} {'private MB':>10}"
+        f" {'peak MB':>10} {'p50 ms':>10} {'p95 ms':>10}"
+    )
+    
+    for mode in selected:
+        try:
+            report = probe_mode(modes[mode], args)
+        except RuntimeError as e:
+            print(f"  {mode:8} skipped ({e})")
+            continue
+        requested = modes[mode].get(f"{args.language.upper()}_BACKEND")
+        if requested and report["backend"] != requested:
+            print(f"  {mode:8} skipped (fell back to the {report['backend']} backend - dependencies missing)")
+            continue
+        if not report["latencies"]:
+            print(f"  {mode:8} skipped (model not loaded - ML libraries or weights unavailable)")
+            continue
+        
+        latencies = report["latencies"]
+        print(
+            f"  {mode:8} {report['load_seconds']:8.2f} {report['model_rss_kb'] / 1024:10.1f}"
+            f" {report['model_private_kb'] / 1024:10.1f} {report['max_rss_kb'] / 1024:10.1f}"
+            f" {percentile(latencies, 50) * 1000:10.1f} {percentile(latencies, 95) * 1000:10.1f}"
+        )
+    
+    print("-" * 89)
+    print("model MB: RSS added by loading; private MB: the part not backed by shared")
+    print("file pages (mmap-ed weights are shared); peak MB: max RSS of the whole process")
+    return 0
+
+
+def benchmark_loading(args) -> int:
+    """Measure load time, RSS and per-poem latency for each model loading mode"""
+    return compare_modes("Model loading benchmark", "mode", LOADING_MODES, args)
+
+
+def benchmark_backends(args) -> int:
+    """Measure load time, RSS and per-poem latency for each inference backend"""
+    return compare_modes("Inference backend benchmark", "backend", BACKEND_MODES, args)
+
+
+def benchmark_speculative(args) -> int:
+    """Compare per-poem latency with and without the draft model"""
+    overrides = {}
+    if args.draft_model:
+        overrides[f"{args.language.upper()}_DRAFT_MODEL"] = args.draft_model
+    
+    print(
+        f"Speculative decoding benchmark ({args.language}, {args.poems} poem(s) per mode,"
+        f" {args.profile} profile, CPU)"
+    )
+    print("-" * 78)
+    print(f"  {'mode':8} {'p50 ms':>10} {'p95 ms':>10} {'speedup':>8} {'accepted':>9} {'tokens/step':>12}  draft")
+    
+    baseline = None
+    for mode, mode_env in SPECULATIVE_MODES.items():
+        try:
+            report = probe_mode(dict(mode_env, **overrides), args)
+        except RuntimeError as e:
+            print(f"  {mode:8} skipped ({e})")
+            continue
+        if not report["model_loaded"]:
+            print(f"  {mode:8} skipped (model not loaded - ML libraries or weights unavailable)")
+            continue
+        
+        speculative = report["speculative"]
+        if mode == "draft" and not speculative["draft_model"]:
+            print(f"  {mode:8} skipped (no compatible draft model - see the log for why)")
+            continue
+        
+        p50 = percentile(report["latencies"], 50)
+        if baseline is None:
+            baseline = p50
+        acceptance = speculative["acceptance_rate"]
+        tokens_per_step = speculative["tokens_per_step"]
+        print(
+            f"  {mode:8} {p50 * 1000:10.1f} {percentile(report['latencies'], 95) * 1000:10.1f}"
+            f" {baseline / p50:7.2f}x"
+            f" {f'{acceptance:.0%}' if acceptance is not None else '-':>9}"
+            f" {f'{tokens_per_step:.2f}' if tokens_per_step is not None else '-':>12}"
+            f"  {speculative['draft_model'] or '-'}"
+        )
+    
+    print("-" * 78)
+    print("accepted: drafted tokens kept by the main model; tokens/step: tokens per main-model forward")
+    import config
+    if config.GENERATION_PROFILES.get(args.profile, {}).get("num_beams") != 1:
+        print(f"Note: the {args.profile} profile uses beam search, which never uses the draft model")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Performance benchmarks for the Bijoy Dibosh Poetry Generator"
+    )
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    
+    startup = subparsers.add_parser(
+        "startup",
+        help="Cold-start import time and RSS for template-only serving"
+    )
+    startup.add_argument("--runs", type=int, default=5, help="Runs per scenario (default: 5)")
+    startup.add_argument(
+        "--budget-ms",
+        type=float,
+        default=100.0,
+        help="Fail if a scenario's median exceeds this (default: 100)"
+    )
+    startup.set_defaults(func=benchmark_startup)
+    
+    profiles = subparsers.add_parser(
+        "profiles",
+        help="Latency and throughput of each generation profile on CPU"
+    )
+    profiles.add_argument("--language", choices=["english", "bengali"], default="english")
+    profiles.add_argument("--theme", default="Freedom")
+    profiles.add_argument("--requests", type=int, default=5, help="Timed requests per profile")
+    profiles.add_argument("--num-outputs", type=int, default=1, help="Poems per request")
+    profiles.add_argument("--threads", type=int, help="torch CPU threads (default: torch's choice)")
+    profiles.add_argument("profiles", nargs="*", help="Profiles to run (default: all)")
+    profiles.set_defaults(func=benchmark_profiles)
+    
+    loading = subparsers.add_parser(
+        "loading",
+        help="Load time, RSS and per-poem latency for each model loading mode"
+    )
+    loading.add_argument("--language", choices=["english", "bengali"], default="english")
+    loading.add_argument("--theme", default="Freedom")
+    loading.add_argument("--poems", type=int, default=5, help="Timed poems per mode")
+    loading.add_argument("--profile", default="fast", help="Generation profile (default: fast)")
+    loading.add_argument("--threads", type=int, help="torch CPU threads (default: torch's choice)")
+    loading.add_argument("modes", nargs="*", help=f"Modes to run: {', '.join(LOADING_MODES)} (default: all)")
+    loading.set_defaults(func=benchmark_loading)
+    
+    backends = subparsers.add_parser(
+        "backends",
+        help="Load time, RSS and per-poem latency for each inference backend"
+    )
+    backends.add_argument("--language", choices=["english", "bengali"], default="english")
+    backends.add_argument("--theme", default="Freedom")
+    backends.add_argument("--poems", type=int, default=5, help="Timed poems per backend")
+    backends.add_argument("--profile", default="fast", help="Generation profile (default: fast)")
+    backends.add_argument("--threads", type=int, help="torch CPU threads (default: torch's choice)")
+    backends.add_argument("modes", nargs="*", help=f"Backends to run: {', '.join(BACKEND_MODES)} (default: all)")
+    backends.set_defaults(func=benchmark_backends)
+    
+    speculative = subparsers.add_parser(
+        "speculative",
+        help="Per-poem latency, speedup and draft acceptance with speculative decoding"
+    )
+    speculative.add_argument("--language", choices=["english", "bengali"], default="english")
+    speculative.add_argument("--theme", default="Freedom")
+    speculative.add_argument("--poems", type=int, default=5, help="Timed poems per mode")
+    speculative.add_argument("--profile", default="fast", help="Generation profile (default: fast)")
+    speculative.add_argument("--threads", type=int, help="torch CPU threads (default: torch's choice)")
+    speculative.add_argument("--draft-model", help="Draft model (default: MODEL_CONFIG[language]['draft_model'])")
+    speculative.set_defaults(func=benchmark_speculative)
+    
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
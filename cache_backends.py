@@ -0,0 +1,289 @@
+"""
+Result cache backends for the Bijoy Dibosh Poetry Generator
+In-memory, SQLite-file and network key-value stores behind one interface,
+so generated poems can be shared across gunicorn workers, hosts and restarts
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, Hashable, Optional
+import config
+from caching import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def _serialize_key(key: Hashable) -> str:
+    """Turn a cache key tuple into a stable string"""
+    if isinstance(key, tuple):
+        key = list(key)
+    return json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+
+
+class ResultCacheBackend:
+    """
+    Interface for result cache backends
+    
+    Values must be JSON-serializable; tuples come back as lists.
+    """
+    
+    name = "base"
+    shared = True  # Whether other processes see the stored values
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        """
+        Get a cached value (default if missing or expired)
+        
+        count=False leaves the hit/miss counters alone, for lookups that
+        aren't poem results (e.g. job status).
+        """
+        try:
+            value = self._get(_serialize_key(key))
+        except Exception as e:
+            logger.warning(f"Result cache read failed: {e}")
+            value = None
+        
+        if not count:
+            return default if value is None else value
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return default if value is None else value
+    
+    def put(self, key: Hashable, value: Any) -> bool:
+        """Store a value; cache failures are logged, never raised"""
+        try:
+            self._put(_serialize_key(key), value)
+            return True
+        except Exception as e:
+            logger.warning(f"Result cache write failed: {e}")
+            return False
+    
+    def stats(self) -> Dict:
+        """Get backend name and hit/miss counters"""
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+    
+    def _get(self, key: str) -> Any:
+        raise NotImplementedError
+    
+    def _put(self, key: str, value: Any):
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(ResultCacheBackend):
+    """Per-process LRU/TTL cache (fastest, but not shared or persistent)"""
+    
+    name = "memory"
+    shared = False
+    
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        super().__init__()
+        self._cache = LRUCache(max_entries=max_entries, ttl=ttl)
+    
+    def _get(self, key: str) -> Any:
+        return self._cache.get(key)
+    
+    def _put(self, key: str, value: Any):
+        self._cache.put(key, value)
+    
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats["entries"] = len(self._cache)
+        stats["evictions"] = self._cache.evictions
+        return stats
+
+
+class SQLiteCacheBackend(ResultCacheBackend):
+    """
+    SQLite-file cache shared by every process on a host
+    
+    Survives restarts and redeploys that keep the file. Entries expire after
+    the TTL and the least recently used ones are pruned above max_entries.
+    """
+    
+    name = "sqlite"
+    PRUNE_EVERY = 64  # Writes between expiry/size pruning passes
+    ACCESS_UPDATE_S = 60.0  # Hits only refresh "accessed" once it is this stale
+    
+    def __init__(self, path: str, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires REAL, accessed REAL NOT NULL)"
+            )
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not shareable)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _get(self, key: str) -> Any:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires, accessed FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        now = time.time()
+        if row[1] is not None and row[1] <= now:
+            return None
+        # Reads stay read-only unless the LRU position is noticeably stale,
+        # so hits from many workers don't queue on SQLite's write lock
+        if now - row[2] >= self.ACCESS_UPDATE_S:
+            with conn:
+                conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+    
+    def _put(self, key: str, value: Any):
+        now = time.time()
+        expires = now + self.ttl if self.ttl is not None else None
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires, now)
+            )
+        
+        with self._writes_lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune(conn, now)
+    
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then least recently used ones above the cap"""
+        with conn:
+            conn.execute("DELETE FROM results WHERE expires IS NOT NULL AND expires <= ?", (now,))
+            if self.max_entries is not None:
+                conn.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+
+class KeyValueCacheBackend(ResultCacheBackend):
+    """
+    Network key-value store cache shared by every host (e.g. Redis)
+    
+    Works with any client offering redis-py style get(name) and
+    set(name, value, ex=seconds); LocalKeyValueStore is an in-process
+    stand-in for development and tests.
+    """
+    
+    name = "kv"
+    
+    def __init__(self, client, ttl: Optional[float] = None, namespace: str = "bijoy:poems:"):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.namespace = namespace
+    
+    def _get(self, key: str) -> Any:
+        raw = self.client.get(self.namespace + key)
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return json.loads(raw)
+    
+    def _put(self, key: str, value: Any):
+        # Stores expire whole seconds; round up so short TTLs still expire
+        ex = max(1, math.ceil(self.ttl)) if self.ttl is not None else None
+        self.client.set(self.namespace + key, json.dumps(value, ensure_ascii=False), ex=ex)
+
+
+class LocalKeyValueStore:
+    """In-process stand-in for a redis-py client (get/set with ex)"""
+    
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.time():
+                del self._data[name]
+                return None
+            return value
+    
+    def set(self, name: str, value: str, ex: Optional[int] = None) -> bool:
+        expires = time.time() + ex if ex else None
+        with self._lock:
+            self._data[name] = (value.encode("utf-8"), expires)
+        return True
+
+
+def create_result_cache(settings: Optional[Dict] = None) -> Optional[ResultCacheBackend]:
+    """
+    Build the result cache backend selected in config.RESULT_CACHE_CONFIG
+    
+    Returns:
+        A backend, or None if result caching is disabled
+    """
+    settings = settings or config.RESULT_CACHE_CONFIG
+    if not settings["enabled"]:
+        return None
+    
+    backend = settings.get("backend", "memory")
+    max_entries = settings["max_entries"]
+    ttl = settings["ttl_seconds"]
+    
+    if backend == "sqlite":
+        return SQLiteCacheBackend(settings["sqlite_path"], max_entries=max_entries, ttl=ttl)
+    
+    if backend == "redis":
+        try:
+            import redis
+            client = redis.Redis.from_url(settings["redis_url"])
+        except ImportError:
+            logger.warning("redis package not installed, using in-memory result cache")
+            return MemoryCacheBackend(max_entries=max_entries, ttl=ttl)
+        return KeyValueCacheBackend(client, ttl=ttl)
+    
+    if backend == "local-kv":
+        cache = KeyValueCacheBackend(LocalKeyValueStore(), ttl=ttl)
+        cache.shared = False  # In-process stand-in
+        return cache
+    
+    return MemoryCacheBackend(max_entries=max_entries, ttl=ttl)
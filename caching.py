@@ -0,0 +1,126 @@
+"""
+Caching utilities for the Bijoy Dibosh Poetry Generator
+Bounded, thread-safe LRU caches with hit/miss accounting
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache
+    
+    Bounded by number of entries and/or total size in bytes (as measured by
+    the sizeof callable). The least recently used entries are evicted first
+    once either limit is exceeded. Entries can optionally expire after a
+    fixed time-to-live.
+    """
+    
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        ttl: Optional[float] = None
+    ):
+        """
+        Initialize the cache
+        
+        Args:
+            max_entries: Maximum number of entries (None for no limit)
+            max_bytes: Maximum total size in bytes (None for no limit)
+            sizeof: Callable returning the size of a value in bytes
+            ttl: Seconds after which an entry expires (None for never)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value and mark it as recently used"""
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            if self.ttl is not None and self._expires[key] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+    
+    def put(self, key: Hashable, value: Any) -> bool:
+        """
+        Store a value, evicting least recently used entries as needed
+        
+        Returns:
+            False if the value alone exceeds max_bytes and was not stored
+        """
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = value
+            self._sizes[key] = size
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+            self.total_bytes += size
+            
+            while self._data and (
+                (self.max_entries is not None and len(self._data) > self.max_entries)
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+        return True
+    
+    def _remove(self, key: Hashable):
+        """Drop an entry (caller holds the lock)"""
+        del self._data[key]
+        self._expires.pop(key, None)
+        self.total_bytes -= self._sizes.pop(key)
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._expires.clear()
+            self.total_bytes = 0
+    
+    def stats(self) -> Dict:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,186 @@
+"""
+Pre-rendered poem catalog for the Bijoy Dibosh Poetry Generator
+Renders poems for every (language, theme) offline into JSONL shards and
+loads them back as a static serving tier for the web app
+"""
+
+import glob
+import json
+import math
+import os
+import random
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+import config
+
+logger = logging.getLogger(__name__)
+
+# One generator (and so one model copy) per worker process and language
+_worker_generators = {}
+_worker_options = {}
+
+
+def shard_path(output_dir: str, language: str, theme: str, shard: int) -> str:
+    """Path of a finished shard file"""
+    return os.path.join(output_dir, language, theme, f"{shard:05d}.jsonl")
+
+
+def _init_worker(threads: int, use_gpu: bool):
+    """Process pool initializer: cap torch threads before any model loads"""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    
+    import poetry_generator
+    if poetry_generator._import_ml():
+        poetry_generator.torch.set_num_threads(threads)
+    
+    _worker_options["use_gpu"] = use_gpu
+
+
+def _render_shard(task: Tuple) -> Tuple:
+    """Render one shard, streaming batches to a .part file renamed when complete"""
+    output_dir, language, theme, shard, count, batch_size, profile = task
+    from poetry_generator import BijoyPoetryGenerator
+    
+    generator = _worker_generators.get(language)
+    if generator is None:
+        generator = BijoyPoetryGenerator(language=language, use_gpu=_worker_options.get("use_gpu"))
+        _worker_generators[language] = generator
+    
+    path = shard_path(output_dir, language, theme, shard)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + ".part"
+    
+    written = 0
+    with open(partial, "w", encoding="utf-8") as f:
+        while written < count:
+            size = min(batch_size, count - written)
+            poems = generator.generate_many([{"theme": theme, "num_outputs": size}], profile)[0]
+            for poem in poems:
+                record = {"language": language, "theme": theme, "poem": poem}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            written += len(poems)
+    
+    os.replace(partial, path)
+    return language, theme, shard, written
+
+
+def prerender_catalog(
+    output_dir: str,
+    per_theme: int = 100,
+    languages: Optional[List[str]] = None,
+    themes: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+    shard_size: int = 50,
+    batch_size: int = 8,
+    profile: Optional[str] = None,
+    use_gpu: bool = False
+) -> int:
+    """
+    Render a catalog of poems for every language and theme in parallel
+    
+    Work is split into shards of shard_size poems, rendered by a process
+    pool with one model per process. Finished shards are skipped, so an
+    interrupted run resumes where it stopped.
+    
+    Args:
+        output_dir: Catalog directory (<language>/<theme>/<shard>.jsonl)
+        per_theme: Poems per (language, theme)
+        languages: Languages to render (default: english and bengali)
+        themes: Themes to render (default: config.THEME_ALIASES)
+        workers: Worker processes (default: cores / threads)
+        threads: torch threads per worker (default: 1)
+        shard_size: Poems per shard file
+        batch_size: Poems per batched model call
+        profile: Generation profile (default: DEFAULT_GENERATION_PROFILE)
+        use_gpu: Use GPU if available
+    
+    Returns:
+        Number of poems rendered in this run
+    """
+    languages = languages or ["english", "bengali"]
+    themes = themes or list(config.THEME_ALIASES)
+    threads = threads or 1
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    
+    tasks = []
+    skipped = 0
+    shards_per_theme = math.ceil(per_theme / shard_size)
+    for language in languages:
+        for theme in themes:
+            for shard in range(shards_per_theme):
+                if os.path.exists(shard_path(output_dir, language, theme, shard)):
+                    skipped += 1
+                    continue
+                count = min(shard_size, per_theme - shard * shard_size)
+                tasks.append((output_dir, language, theme, shard, count, batch_size, profile))
+    
+    print(f"Catalog: {len(tasks)} shard(s) to render, {skipped} already done "
+          f"({workers} worker(s) x {threads} thread(s))")
+    if not tasks:
+        return 0
+    
+    rendered = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(threads, use_gpu)
+    ) as executor:
+        futures = [executor.submit(_render_shard, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            language, theme, shard, written = future.result()
+            rendered += written
+            elapsed = time.perf_counter() - start
+            print(f"  [{done}/{len(tasks)}] {language}/{theme} shard {shard}: "
+                  f"{written} poem(s) ({rendered / elapsed:.1f} poems/s)")
+    
+    return rendered
+
+
+class PoemCatalog:
+    """Pre-rendered poems loaded into memory, served per (language, theme)"""
+    
+    def __init__(self, poems: Dict[Tuple[str, str], List[str]]):
+        self._poems = poems
+    
+    @classmethod
+    def load(cls, directory: str) -> "PoemCatalog":
+        """Load every finished shard under a catalog directory"""
+        poems = {}
+        for path in sorted(glob.glob(os.path.join(directory, "*", "*", "*.jsonl"))):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    poems.setdefault((record["language"], record["theme"]), []).append(record["poem"])
+        
+        catalog = cls(poems)
+        logger.info(f"Loaded poem catalog from {directory}: {catalog.size()} poem(s)")
+        return catalog
+    
+    def sample(
+        self,
+        language: str,
+        theme: str,
+        count: int = 1,
+        rng: Optional[random.Random] = None
+    ) -> Optional[List[str]]:
+        """Pick count distinct poems for a normalized theme (None if too few)"""
+        poems = self._poems.get((language, theme))
+        if not poems or len(poems) < count:
+            return None
+        return (rng or random).sample(poems, count)
+    
+    def size(self) -> int:
+        """Total number of poems in the catalog"""
+        return sum(len(poems) for poems in self._poems.values())
+    
+    def stats(self) -> Dict:
+        """Get poem counts per language/theme pair"""
+        return {f"{language}/{theme}": len(poems) for (language, theme), poems in self._poems.items()}
@@ -10,6 +10,10 @@ MODEL_CONFIG = {
         "model_name": "csebuetnlp/mT5_multilingual_XLSum",  # Good for Bengali
         "tokenizer_name": "csebuetnlp/mT5_multilingual_XLSum",
         "max_length": 150,
+        "backend": os.environ.get("BENGALI_BACKEND", "torch"),  # torch, onnx, template
+        # Draft model for speculative decoding: must share the main model's
+        # tokenizer, e.g. a causal alternative below once model_name is one
+        "draft_model": os.environ.get("BENGALI_DRAFT_MODEL") or None,
         "alternative_models": [
             "sagorsarker/bangla-gpt2",
             "flax-community/gpt2-bengali"
@@ -19,6 +23,8 @@ MODEL_CONFIG = {
         "model_name": "gpt2",  # Standard GPT-2 for English
         "tokenizer_name": "gpt2",
         "max_length": 150,
+        "backend": os.environ.get("ENGLISH_BACKEND", "torch"),  # torch, onnx, template
+        "draft_model": os.environ.get("ENGLISH_DRAFT_MODEL", "distilgpt2"),
         "alternative_models": [
             "gpt2-medium",
             "distilgpt2"
@@ -26,6 +32,29 @@ MODEL_CONFIG = {
     }
 }
 
+# Model weight loading (applies to every language)
+# mmap re-points weights at a copy-on-write mmap of the safetensors
+# checkpoint (CPU, weights whose dtype matches the file), so they sit in the
+# page cache, shared by every process on the host; otherwise weights are
+# private copies (forked workers still share them until written).
+# dtype "bfloat16" halves weight memory; quantize "int8" applies dynamic int8
+# quantization to linear layers on CPU (float32 weights only, no mmap)
+MODEL_LOADING_CONFIG = {
+    "mmap": os.environ.get("MODEL_MMAP", "False") == "True",
+    "dtype": os.environ.get("MODEL_DTYPE", "float32"),          # float32, bfloat16, float16
+    "quantize": os.environ.get("MODEL_QUANTIZE", "none"),       # none, int8
+}
+
+# Speculative (assisted) decoding: MODEL_CONFIG[language]["draft_model"]
+# proposes tokens that the main model verifies in one forward pass. Used for
+# single-poem calls with num_beams == 1 (the "fast" profile and streaming);
+# disabled for a language when the draft's tokenizer differs from the main
+# model's. Compare with: python benchmark.py speculative
+SPECULATIVE_CONFIG = {
+    "enabled": os.environ.get("SPECULATIVE_DECODING", "False") == "True",
+    "num_assistant_tokens": int(os.environ.get("SPECULATIVE_DRAFT_TOKENS", 5)),
+}
+
 # Generation Parameters
 GENERATION_CONFIG = {
     "temperature": 0.8,          # Higher = more creative, lower = more focused
@@ -39,6 +68,40 @@ GENERATION_CONFIG = {
     "early_stopping": True        # Stop when all beams finish
 }
 
+# Generation Profiles (latency tiers, selectable per request)
+# CPU decode cost grows roughly linearly with num_beams
+GENERATION_PROFILES = {
+    "fast": {                     # Plain sampling, no beams
+        **GENERATION_CONFIG,
+        "num_beams": 1,
+        "early_stopping": False
+    },
+    "balanced": {                 # Small beam
+        **GENERATION_CONFIG,
+        "num_beams": 2
+    },
+    "quality": dict(GENERATION_CONFIG)  # Full beam search (original defaults)
+}
+DEFAULT_GENERATION_PROFILE = os.environ.get("GENERATION_PROFILE", "quality")
+
+# Per-language token budgets, calibrated from the training corpus at model load
+# (longest 4-line poem in tokens x margin, capped at max_new_tokens above).
+# Set "max_new_tokens" in MODEL_CONFIG[language] to override.
+TOKEN_BUDGET_CONFIG = {
+    "enabled": True,
+    "margin": 1.5,                # Headroom over the longest corpus poem
+    "min_new_tokens": 32,         # Never budget fewer tokens than this
+}
+
+# Deadline-aware generation: requests with a latency budget fall back to
+# template-based poems when the model cannot finish in time
+DEADLINE_CONFIG = {
+    "default_ms": float(os.environ["DEFAULT_DEADLINE_MS"]) if os.environ.get("DEFAULT_DEADLINE_MS") else None,
+    "max_ms": 110000,             # Upper bound accepted by the API (gunicorn --timeout is 120 s)
+    "ewma_alpha": 0.3,            # Weight of the newest sample in the model latency average
+    "probe_interval_s": 30,       # Retry a too-slow model at most this often
+}
+
 # Poetry Format
 POETRY_FORMAT = {
     "lines": 4,                   # Default number of lines
@@ -57,6 +120,12 @@ THEMES_DATA_PATH = os.path.join(DATA_DIR, "themes.json")
 os.makedirs(MODEL_DIR, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# ONNX Runtime backend (MODEL_CONFIG[language]["backend"] = "onnx")
+ONNX_CONFIG = {
+    "export_dir": os.environ.get("ONNX_EXPORT_DIR", os.path.join(MODEL_DIR, "onnx")),
+    "provider": "CPUExecutionProvider",
+}
+
 # Prompts Templates
 PROMPT_TEMPLATES = {
     "bengali": {
@@ -89,6 +158,119 @@ API_CONFIG = {
     "debug": os.environ.get("DEBUG", "False") == "True"
 }
 
+# Eager model loading at worker start (see /ready)
+# "off": load lazily on the first generate call (ready immediately)
+# "background": load and warm up in a thread started by the first request
+#   (e.g. the first /ready probe); /ready is 503 until done
+# "blocking": load and warm up during import, e.g. in the gunicorn master
+#   with --preload so forked workers share the loaded weights
+PRELOAD_CONFIG = {
+    "mode": os.environ.get("PRELOAD_MODELS", "off"),
+    "languages": [
+        language.strip()
+        for language in os.environ.get("PRELOAD_LANGUAGES", "english,bengali").split(",")
+        if language.strip()
+    ],
+    "warmup_profile": "fast",     # Profile of the throwaway warm-up generation
+}
+
+# Cross-request micro-batching for /api/generate
+# Concurrent requests only share a batch within one process, so run gunicorn
+# with threads (e.g. --threads 8) when enabling this
+BATCHING_CONFIG = {
+    "enabled": os.environ.get("ENABLE_BATCHING", "False") == "True",
+    "max_batch_size": int(os.environ.get("BATCH_MAX_SIZE", 8)),       # Max poems per model call
+    "max_wait_ms": int(os.environ.get("BATCH_MAX_WAIT_MS", 20)),      # Max time to wait for more requests
+}
+
+# Bulk /api/generate/batch limits
+BATCH_API_CONFIG = {
+    "max_items": int(os.environ.get("BATCH_API_MAX_ITEMS", 50)),            # Items per request
+    "max_total_outputs": int(os.environ.get("BATCH_API_MAX_OUTPUTS", 100)),  # Poems per request
+}
+
+# Asynchronous /api/jobs for large generation runs
+JOBS_CONFIG = {
+    "workers": int(os.environ.get("JOB_WORKERS", 1)),            # Jobs generating at once
+    "max_queued": int(os.environ.get("JOB_MAX_QUEUED", 16)),     # Waiting jobs before 503
+    "max_items": int(os.environ.get("JOB_MAX_ITEMS", 1000)),     # Items per job
+    "chunk_size": 8,              # Items per batched generate call (results publish per chunk)
+    "ttl_seconds": int(os.environ.get("JOB_TTL", 60 * 60)),      # Keep finished jobs this long
+}
+
+# ASGI serving mode (see asgi.py): model calls run on a bounded thread pool
+ASGI_CONFIG = {
+    "workers": int(os.environ.get("ASGI_GENERATE_THREADS", 4)),   # Model calls running at once
+    "max_queued": int(os.environ.get("ASGI_MAX_QUEUED", 32)),     # Waiting model calls before 503
+}
+
+# Dedicated inference server (see inference_server.py)
+# When INFERENCE_SERVER is set, web workers send generation calls to it
+# instead of loading their own model copies
+INFERENCE_SERVER_CONFIG = {
+    "address": os.environ.get("INFERENCE_SERVER"),                     # "host:port" or Unix socket path
+    "authkey": os.environ.get("INFERENCE_SERVER_AUTHKEY"),             # Required shared secret
+    "processes": int(os.environ.get("INFERENCE_PROCESSES", 2)),         # Model-holding processes
+    "threads": int(os.environ.get("INFERENCE_THREADS", 1)),             # torch threads per process
+    "max_queued": int(os.environ.get("INFERENCE_MAX_QUEUED", 32)),      # Waiting calls before "busy"
+    "timeout_s": 120,
+}
+
+# Result cache for seeded requests, keyed by
+# (language, normalized theme, seed, num_outputs, generation profile)
+# Backends: "memory" (per process), "sqlite" (shared by all workers on a host,
+# survives restarts), "redis" (shared across hosts), "local-kv" (in-process
+# stand-in for redis)
+RESULT_CACHE_CONFIG = {
+    "enabled": os.environ.get("ENABLE_RESULT_CACHE", "True") == "True",
+    "backend": os.environ.get("RESULT_CACHE_BACKEND", "memory"),
+    "sqlite_path": os.environ.get("RESULT_CACHE_PATH", os.path.join(BASE_DIR, "cache", "results.sqlite3")),
+    "redis_url": os.environ.get("REDIS_URL", "redis://localhost:6379/0"),
+    "max_entries": int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 4096)),
+    "ttl_seconds": int(os.environ.get("RESULT_CACHE_TTL", 24 * 60 * 60)),
+}
+
+# Pre-rendered poem catalog (see generate_poetry.py --prerender-catalog)
+# When set, /api/generate serves unseeded default-profile requests from it
+CATALOG_CONFIG = {
+    "path": os.environ.get("POEM_CATALOG_DIR"),
+}
+
+# Background pool of pre-generated model poems per (language, theme)
+POOL_CONFIG = {
+    "enabled": os.environ.get("ENABLE_POEM_POOL", "False") == "True",
+    "low_water": int(os.environ.get("POOL_LOW_WATER", 4)),     # Start refilling below this depth
+    "high_water": int(os.environ.get("POOL_HIGH_WATER", 16)),  # Stop refilling at this depth
+    "refill_batch": 4,            # Poems per background generate call
+    "max_load": 0.5,              # Only refill while 1-min load per core is below this
+    "poll_interval_s": 1.0,       # How often a paused refill re-checks
+}
+
+# Few-shot prefix KV cache (reuses past_key_values of example poem blocks)
+PREFIX_CACHE_CONFIG = {
+    "enabled": os.environ.get("ENABLE_PREFIX_CACHE", "True") == "True",
+    "max_bytes": int(os.environ.get("PREFIX_CACHE_MAX_MB", 256)) * 1024 * 1024,
+}
+
+# Encoder output cache for seq2seq (mT5) models, keyed by full prompt
+ENCODER_CACHE_CONFIG = {
+    "enabled": os.environ.get("ENABLE_ENCODER_CACHE", "True") == "True",
+    "max_entries": int(os.environ.get("ENCODER_CACHE_MAX_ENTRIES", 128)),
+}
+
+# Sequence-length bucketing for batched generate calls: prompts are grouped
+# by token length so short prompts aren't padded to a long batch member.
+# Each group is padded to its longest prompt, or to its fixed bucket length
+# for backends that need few input shapes (onnx). Every extra generate call
+# repeats the decoding loop, so buckets with fewer than min_batch_size
+# prompts merge into the next one
+LENGTH_BUCKETING_CONFIG = {
+    "enabled": os.environ.get("LENGTH_BUCKETING", "True") == "True",
+    "buckets": [32, 48, 64, 80, 96, 128, 160, 192, 256, 320, 384, 512],  # Padded prompt lengths; the last is the max
+    "min_batch_size": int(os.environ.get("BUCKET_MIN_BATCH_SIZE", 4)),
+    "history": 50,                         # Recent batches reported by get_stats()
+}
+
 # Logging
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -3,10 +3,16 @@ Command Line Interface for Bijoy Dibosh Poetry Generator
 """
 
 import argparse
+import itertools
+import json
 import sys
 from poetry_generator import BijoyPoetryGenerator
+from validation import ValidationError, validate_item
 import config
 
+# Poems one JSONL batch job may ask for (each is a row of a batched model call)
+BATCH_MAX_OUTPUTS = 20
+
 
 def print_banner():
     """Print application banner"""
@@ -51,6 +57,13 @@ Examples:
   
   # List available themes
   python generate_poetry.py --list-themes
+  
+  # Bulk generation: one JSON job per line in, one JSON result per line out
+  # (--seed makes each chunk reproducible; a per-job "seed" costs its own model call)
+  echo '{"theme": "Freedom", "num_outputs": 2}' | python generate_poetry.py --batch - --seed 1
+  
+  # Pre-render 500 poems per theme and language (resumable)
+  python generate_poetry.py --prerender-catalog catalog/ --per-theme 500 --threads 2
 
 Available Themes:
   freedom, sacrifice, victory, heroes, future, independence, unity, courage
@@ -79,6 +92,20 @@ Available Themes:
         help="Number of different poems to generate (default: 1)"
     )
     
+    parser.add_argument(
+        "--profile",
+        type=str,
+        choices=list(config.GENERATION_PROFILES),
+        default=config.DEFAULT_GENERATION_PROFILE,
+        help=f"Generation profile / latency tier (default: {config.DEFAULT_GENERATION_PROFILE})"
+    )
+    
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed for reproducible output (batch mode: seed of the first chunk)"
+    )
+    
     parser.add_argument(
         "--slogan",
         action="store_true",
@@ -103,8 +130,55 @@ Available Themes:
         help="Run in interactive mode"
     )
     
+    batch_group = parser.add_argument_group("batch mode")
+    batch_group.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Read JSONL jobs from FILE ('-' for stdin) and stream JSONL results to stdout"
+    )
+    batch_group.add_argument(
+        "--batch-size",
+        type=int,
+        default=32,
+        help="Jobs grouped into one batched model call per language (default: 32)"
+    )
+    
+    catalog_group = parser.add_argument_group("catalog pre-rendering")
+    catalog_group.add_argument(
+        "--prerender-catalog",
+        metavar="DIR",
+        help="Pre-render poems for every theme and language into DIR (resumable)"
+    )
+    catalog_group.add_argument(
+        "--per-theme",
+        type=int,
+        default=100,
+        help="Poems per theme and language (default: 100)"
+    )
+    catalog_group.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes, one model each (default: CPU cores / --threads)"
+    )
+    catalog_group.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="torch threads per worker process (default: 1)"
+    )
+    catalog_group.add_argument(
+        "--shard-size",
+        type=int,
+        default=50,
+        help="Poems per JSONL shard file (default: 50)"
+    )
+    
     args = parser.parse_args()
     
+    # Batch mode keeps stdout pure JSONL, so no banner
+    if args.batch:
+        return batch_mode(args)
+    
     # Print banner
     print_banner()
     
@@ -117,6 +191,21 @@ Available Themes:
         print()
         return 0
     
+    # Pre-render catalog and exit
+    if args.prerender_catalog:
+        from catalog import prerender_catalog
+        rendered = prerender_catalog(
+            args.prerender_catalog,
+            per_theme=args.per_theme,
+            workers=args.workers,
+            threads=args.threads,
+            shard_size=args.shard_size,
+            profile=args.profile,
+            use_gpu=not args.no_gpu
+        )
+        print(f"\n✓ Rendered {rendered} poem(s) into {args.prerender_catalog}\n")
+        return 0
+    
     # Initialize generator
     try:
         use_gpu = not args.no_gpu
@@ -134,7 +223,7 @@ Available Themes:
     if args.slogan:
         print("Random Victory Day Slogan:")
         print("-" * 60)
-        print(f"  {generator.get_random_slogan()}")
+        print(f"  {generator.get_random_slogan(seed=args.seed)}")
         print()
         return 0
     
@@ -148,7 +237,9 @@ Available Themes:
         print(f"Generating poem(s) for theme: {args.theme}...")
         poems = generator.generate(
             theme=args.theme,
-            num_outputs=args.num_outputs
+            num_outputs=args.num_outputs,
+            profile=args.profile,
+            seed=args.seed
         )
         
         for i, poem in enumerate(poems, 1):
@@ -163,6 +254,103 @@ Available Themes:
     return 0
 
 
+def parse_job(line: str, index: int, default_language: str):
+    """Parse and validate one JSONL batch job; returns (job, error)"""
+    try:
+        job = json.loads(line)
+    except json.JSONDecodeError as e:
+        return None, f"Invalid JSON: {e}"
+    
+    try:
+        if isinstance(job, dict):
+            job = {"language": default_language, **job}
+        params = validate_item(job, BATCH_MAX_OUTPUTS)
+    except ValidationError as e:
+        return None, str(e)
+    return {"id": job.get("id", index), **params}, None
+
+
+def batch_mode(args) -> int:
+    """
+    Generate poems for many JSONL jobs, streaming JSONL results to stdout
+    
+    Each input line is a job like {"theme": "Freedom", "language": "bengali",
+    "num_outputs": 2, "id": "optional"}, validated like an API item with
+    num_outputs up to BATCH_MAX_OUTPUTS. Jobs are read in chunks of
+    --batch-size, grouped by language into batched generate_many() calls
+    on one generator (and model) per language, and each result line is
+    written as soon as its chunk completes. Results carry the job's "id"
+    (its input line number by default).
+    
+    With --seed, the Nth chunk's calls are seeded with seed + N, recorded
+    as "batch_seed" in each result, so rerunning the same file with the
+    same --seed and --batch-size reproduces it. A job's own "seed" still
+    reproduces it exactly on its own, at the cost of a separate
+    (unbatched) model call for that job.
+    """
+    source = sys.stdin if args.batch == "-" else open(args.batch, "r", encoding="utf-8")
+    generators = {}
+    completed = 0
+    failed = 0
+    
+    def emit(record):
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+    
+    def run_chunk(chunk, batch_seed):
+        nonlocal completed, failed
+        by_language = {}
+        for job in chunk:
+            by_language.setdefault(job["language"], []).append(job)
+        
+        for language, jobs in by_language.items():
+            if language not in generators:
+                generators[language] = BijoyPoetryGenerator(language=language, use_gpu=not args.no_gpu)
+            try:
+                results = generators[language].generate_many(jobs, args.profile, batch_seed=batch_seed)
+            except Exception as e:
+                for job in jobs:
+                    emit({"id": job["id"], "error": str(e)})
+                failed += len(jobs)
+                continue
+            for job, poems in zip(jobs, results):
+                emit({
+                    "id": job["id"],
+                    "theme": job["theme"],
+                    "language": language,
+                    "seed": job["seed"],
+                    "batch_seed": batch_seed if job["seed"] is None else None,
+                    "poems": poems
+                })
+            completed += len(jobs)
+    
+    # Chunk N is seeded with --seed + N
+    seeds = itertools.count(args.seed) if args.seed is not None else itertools.repeat(None)
+    
+    try:
+        chunk = []
+        for index, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            job, error = parse_job(line, index, args.language)
+            if error:
+                emit({"id": index, "error": error})
+                failed += 1
+                continue
+            chunk.append(job)
+            if len(chunk) >= args.batch_size:
+                run_chunk(chunk, next(seeds))
+                chunk = []
+        if chunk:
+            run_chunk(chunk, next(seeds))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    
+    print(f"✓ Batch complete: {completed} job(s) done, {failed} failed", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+
 def interactive_mode(generator: BijoyPoetryGenerator):
     """Run the generator in interactive mode"""
     print("=== Interactive Mode ===")
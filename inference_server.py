@@ -0,0 +1,347 @@
+"""
+Inference server for the Bijoy Dibosh Poetry Generator
+Holds the models in a fixed pool of processes that web workers reach over
+local IPC, so the number of HTTP workers no longer multiplies model memory
+
+Run with (both sides need the same INFERENCE_SERVER_AUTHKEY):
+    python inference_server.py --processes 2
+    INFERENCE_SERVER=127.0.0.1:6100 gunicorn -w 8 app:app
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+from typing import Dict, Iterator, List, Optional
+import config
+from poetry_generator import BijoyPoetryGenerator
+
+logger = logging.getLogger(__name__)
+
+# Generator methods web workers may call remotely (run by a model process)
+REMOTE_METHODS = {
+    "generate",
+    "generate_many",
+    "warm_up",
+}
+
+# Answered by the server itself from the model processes' latest reports,
+# so they never wait behind generation calls
+SERVER_METHODS = {
+    "get_stats",
+}
+
+
+class InferenceServerBusy(RuntimeError):
+    """The inference server's task queue is full"""
+
+
+def parse_address(address: str):
+    """Turn "host:port" into a TCP address; anything else is a Unix socket path"""
+    if not isinstance(address, str):
+        return address  # Already parsed
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def _authkey() -> bytes:
+    """The shared INFERENCE_SERVER_AUTHKEY (required: the server runs code for its clients)"""
+    authkey = config.INFERENCE_SERVER_CONFIG["authkey"]
+    if not authkey:
+        raise ValueError("Set INFERENCE_SERVER_AUTHKEY to the same secret for the inference server and web workers")
+    return authkey.encode("utf-8")
+
+
+def _model_process(conn, threads: int):
+    """
+    Model process: one generator per language, serving calls from its pipe
+    until None or EOF
+    
+    Each reply carries the generator's latest stats, which the server uses
+    to answer get_stats without queueing.
+    """
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    
+    import poetry_generator
+    if poetry_generator._import_ml():
+        poetry_generator.torch.set_num_threads(threads)
+    
+    generators = {}
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        language, method, args, kwargs = task
+        try:
+            if language not in generators:
+                generators[language] = poetry_generator.BijoyPoetryGenerator(language=language)
+            reply = ("ok", getattr(generators[language], method)(*args, **kwargs))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        stats = dict(generators[language].get_stats(), pid=os.getpid()) if language in generators else None
+        conn.send((*reply, stats))
+
+
+class InferenceServer:
+    """
+    Fixed pool of model processes behind a multiprocessing Listener
+    
+    Each client connection gets a handler thread that forwards its calls
+    onto one bounded task queue; one dispatcher thread per model process
+    feeds it calls over its own pipe. When max_queued calls are already
+    waiting, new calls are refused with a "busy" reply instead of piling
+    up, so web workers can shed load. A model process that dies (e.g.
+    killed for running out of memory) fails the call it was running and is
+    replaced.
+    """
+    
+    def __init__(
+        self,
+        address: Optional[str] = None,
+        processes: Optional[int] = None,
+        threads: Optional[int] = None,
+        max_queued: Optional[int] = None
+    ):
+        """
+        Initialize the server
+        
+        Args:
+            address: "host:port" or Unix socket path (default: from config)
+            processes: Model processes (default: from config)
+            threads: torch threads per model process (default: from config)
+            max_queued: Calls allowed to wait for a model process (default: from config)
+        """
+        settings = config.INFERENCE_SERVER_CONFIG
+        self.address = parse_address(address or settings["address"] or "127.0.0.1:6100")
+        self.processes = processes or settings["processes"]
+        self.threads = threads or settings["threads"]
+        self.authkey = _authkey()
+        
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks = queue.Queue(maxsize=max_queued or settings["max_queued"])
+        self._stats = {}        # (process index, language) -> latest generator stats
+        self._stats_lock = threading.Lock()
+    
+    def serve_forever(self):
+        """Start the model processes and accept client connections"""
+        for index in range(self.processes):
+            threading.Thread(target=self._dispatch, args=(index,), name=f"inference-{index}", daemon=True).start()
+        
+        with Listener(self.address, authkey=self.authkey) as listener:
+            logger.info(f"Inference server listening on {self.address} "
+                        f"({self.processes} process(es) x {self.threads} thread(s))")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.warning(f"Rejected inference client: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+    
+    def _spawn(self, index: int):
+        """Start model process number index; returns it and its end of the pipe"""
+        conn, child_conn = self._context.Pipe()
+        worker = self._context.Process(
+            target=_model_process,
+            args=(child_conn, self.threads),
+            name=f"inference-{index}",
+            daemon=True
+        )
+        worker.start()
+        child_conn.close()  # So recv() sees EOF if the process dies
+        return worker, conn
+    
+    def _respawn(self, index: int, worker, conn):
+        """Replace a dead model process and forget its stats"""
+        worker.join()
+        conn.close()
+        logger.error(f"Model process {worker.pid} died (exit code {worker.exitcode}), restarting it")
+        with self._stats_lock:
+            for key in [key for key in self._stats if key[0] == index]:
+                del self._stats[key]
+        return self._spawn(index)
+    
+    def _dispatch(self, index: int):
+        """Feed calls to one model process, replacing it whenever it dies"""
+        worker, conn = self._spawn(index)
+        while True:
+            future, task = self._tasks.get()
+            if not worker.is_alive():
+                worker, conn = self._respawn(index, worker, conn)  # Died while idle
+            
+            try:
+                conn.send(task)
+                status, value, stats = conn.recv()
+            except (EOFError, OSError):
+                future.set_result(("error", "Model process died while running this call"))
+                worker, conn = self._respawn(index, worker, conn)
+                continue
+            
+            if stats is not None:
+                with self._stats_lock:
+                    self._stats[(index, task[0])] = stats
+            future.set_result((status, value))
+    
+    def _submit(self, language: str, method: str, args: List, kwargs: Dict) -> Future:
+        """Queue a call for the model processes (raises queue.Full when busy)"""
+        future = Future()
+        self._tasks.put_nowait((future, (language, method, args, kwargs)))
+        return future
+    
+    def _get_stats(self, language: str) -> Dict:
+        """Latest stats reported by each model process for a language"""
+        with self._stats_lock:
+            processes = [
+                stats for (_, stats_language), stats in sorted(self._stats.items())
+                if stats_language == language
+            ]
+        return {"language": language, "remote": True, "processes": processes}
+    
+    def _handle(self, conn):
+        """Serve one client connection until it closes"""
+        with conn:
+            while True:
+                try:
+                    language, method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                
+                if method in SERVER_METHODS:
+                    conn.send(("ok", self._get_stats(language)))
+                    continue
+                if method not in REMOTE_METHODS:
+                    conn.send(("error", f"Method not allowed: {method}"))
+                    continue
+                try:
+                    future = self._submit(language, method, args, kwargs)
+                except queue.Full:
+                    conn.send(("busy", "Inference queue is full"))
+                    continue
+                conn.send(future.result())
+
+
+class RemoteGenerator:
+    """
+    Client-side stand-in for BijoyPoetryGenerator backed by the inference server
+    
+    Keeps a small pool of connections so concurrent request threads don't
+    share one (Connection objects are not thread-safe). Themes, slogans and
+    theme normalization only need config and training data, so a local
+    generator (which never loads a model) answers them without a round trip.
+    """
+    
+    def __init__(self, language: str = "english", address: Optional[str] = None):
+        settings = config.INFERENCE_SERVER_CONFIG
+        self.language = language
+        self.address = parse_address(address or settings["address"])
+        self.authkey = _authkey()
+        self.timeout = settings["timeout_s"]
+        self._idle = queue.LifoQueue()
+        self._local = BijoyPoetryGenerator(language=language)
+        self._siblings = {}
+    
+    def _for_language(self, language: str) -> "RemoteGenerator":
+        """Client for another language on the same server"""
+        if language not in self._siblings:
+            self._siblings[language] = RemoteGenerator(language, self.address)
+        return self._siblings[language]
+    
+    def _call(self, method: str, *args, **kwargs):
+        """Run a generator method in a model process"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = Client(self.address, authkey=self.authkey)
+        
+        try:
+            conn.send((self.language, method, args, kwargs))
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"Inference server did not answer within {self.timeout}s")
+            status, value = conn.recv()
+        except BaseException:
+            conn.close()  # Drop connections that may hold a stale reply
+            raise
+        self._idle.put(conn)
+        
+        if status == "busy":
+            raise InferenceServerBusy(value)
+        if status == "error":
+            raise RuntimeError(value)
+        return value
+    
+    def generate(self, theme: str, language: Optional[str] = None, **kwargs) -> List[str]:
+        if language is not None and language != self.language:
+            return self._for_language(language)._call("generate", theme, **kwargs)
+        return self._call("generate", theme, **kwargs)
+    
+    def generate_many(self, items: List[Dict], profile: Optional[str] = None,
+                      deadline_ms: Optional[float] = None,
+                      batch_seed: Optional[int] = None) -> List[List[str]]:
+        return self._call("generate_many", items, profile, deadline_ms, batch_seed)
+    
+    def generate_stream(self, theme: str, language: Optional[str] = None,
+                        profile: Optional[str] = None) -> Iterator[str]:
+        """Lines of one remotely generated poem (delivered once it is complete)"""
+        poem = self.generate(theme, language=language, profile=profile)[0]
+        yield from (line for line in poem.split("\n") if line.strip())
+    
+    def get_random_slogan(self, seed: Optional[int] = None) -> str:
+        return self._local.get_random_slogan(seed=seed)
+    
+    def get_available_themes(self) -> List[str]:
+        return self._local.get_available_themes()
+    
+    def get_stats(self) -> Dict:
+        """Latest stats of each model process (answered without queueing)"""
+        return self._call("get_stats")
+    
+    def get_cache_stats(self) -> Dict:
+        """Result and model-side cache stats of each model process"""
+        keys = ("pid", "result_cache", "prefix_cache", "encoder_cache")
+        return {"processes": [{key: stats.get(key) for key in keys} for stats in self.get_stats()["processes"]]}
+    
+    def warm_up(self, profile: Optional[str] = None) -> float:
+        return self._call("warm_up", profile)
+    
+    def _normalize_theme(self, theme: str) -> str:
+        return self._local._normalize_theme(theme)
+    
+    def _model_disabled(self) -> bool:
+        """Whether the configured backend runs a model (from config, not the server's state)"""
+        return not self._local.backend.enabled
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Model-holding inference server for the Bijoy Dibosh Poetry Generator"
+    )
+    parser.add_argument("--address", help='"host:port" or Unix socket path (default: INFERENCE_SERVER)')
+    parser.add_argument("--processes", type=int, help="Model processes (default: INFERENCE_PROCESSES)")
+    parser.add_argument("--threads", type=int, help="torch threads per process (default: INFERENCE_THREADS)")
+    parser.add_argument("--max-queued", type=int, help="Calls allowed to wait (default: INFERENCE_MAX_QUEUED)")
+    args = parser.parse_args()
+    
+    if not config.INFERENCE_SERVER_CONFIG["authkey"]:
+        parser.error("INFERENCE_SERVER_AUTHKEY must be set (the same secret as the web workers)")
+    
+    logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+    server = InferenceServer(args.address, args.processes, args.threads, args.max_queued)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Asynchronous generation jobs for the Bijoy Dibosh Poetry Generator
+Runs large generation requests on a small background worker pool so they
+don't hold an HTTP request (and a web worker) open until they finish. Job
+state is published to a shared store (the sqlite/redis result cache) so any
+web worker can answer status requests.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+import logging
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """One queued generation job and its (partial) results"""
+    
+    def __init__(self, items: List[Dict], profile: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.items = items
+        self.profile = profile
+        self.status = "queued"
+        self.results = [None] * len(items)
+        self.completed = 0
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+    
+    def is_expired(self, ttl: float) -> bool:
+        """Whether the job finished more than ttl seconds ago"""
+        return self.finished is not None and self.finished < time.time() - ttl
+    
+    def to_dict(self) -> Dict:
+        """Job status and results so far (None for items not yet generated)"""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "profile": self.profile,
+            "total": len(self.items),
+            "completed": self.completed,
+            "results": list(self.results),
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished
+        }
+
+
+class JobManager:
+    """
+    Bounded queue of generation jobs served by a fixed pool of worker threads
+    
+    At most `workers` jobs generate at once, so bulk work can't crowd out
+    interactive requests; submit() refuses new jobs once max_queued are
+    waiting. Each job runs in chunks of up to chunk_size items, one
+    generate_many() call per language, and publishes results after every
+    chunk. Finished jobs are forgotten after ttl_seconds.
+    
+    Jobs run in the process that accepted them. With a shared store every
+    state change is also written there, so status lookups work from any
+    worker process; without one, serve jobs from a single worker.
+    """
+    
+    def __init__(
+        self,
+        get_generator: Callable,
+        workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        inline: Optional[Callable[[], ContextManager]] = None,
+        store=None
+    ):
+        """
+        Initialize the job manager
+        
+        Args:
+            get_generator: Callable returning the generator for a language
+            workers: Jobs running concurrently (default: from config)
+            max_queued: Jobs allowed to wait for a worker (default: from config)
+            chunk_size: Items per batched generation call (default: from config)
+            ttl_seconds: How long finished jobs are kept (default: from config)
+            inline: Context manager factory wrapped around each generation
+                call, e.g. so the poem pool backs off (optional)
+            store: Result cache backend shared by the web workers, used to
+                publish job state across processes (optional)
+        """
+        self._get_generator = get_generator
+        self._inline = inline or nullcontext
+        self._store = store if store is not None and store.shared else None
+        self.workers = workers or config.JOBS_CONFIG["workers"]
+        self.chunk_size = chunk_size or config.JOBS_CONFIG["chunk_size"]
+        self.ttl = ttl_seconds if ttl_seconds is not None else config.JOBS_CONFIG["ttl_seconds"]
+        self._queue = queue.Queue(maxsize=max_queued or config.JOBS_CONFIG["max_queued"])
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None    # Process the worker threads run in (threads don't survive fork)
+    
+    def start(self):
+        """Start the worker threads (idempotent per process, so a forked child starts its own)"""
+        with self._lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            if self._threads:
+                # Forked after starting: the queue's waiters are the parent's threads
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._threads = []
+            self._pid = os.getpid()
+            if self._store is None:
+                logger.warning("Job state is per-process: run a single web worker or use the sqlite/redis result cache")
+            for index in range(self.workers):
+                worker = threading.Thread(target=self._run, name=f"job-worker-{index}", daemon=True)
+                worker.start()
+                self._threads.append(worker)
+    
+    def submit(self, items: List[Dict], profile: Optional[str] = None) -> Optional[Job]:
+        """
+        Queue a job of validated items (dicts with theme, language,
+        num_outputs and seed)
+        
+        Returns:
+            The queued job, or None if the queue is full
+        """
+        self.start()
+        self._prune()
+        
+        job = Job(items, profile)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            return None
+        self._publish(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job of this process by id (None if unknown or expired)"""
+        self._prune()
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def status(self, job_id: str) -> Optional[Dict]:
+        """
+        Get a job's status and results so far, whichever worker process
+        runs it (None if unknown or expired)
+        """
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self._store is None:
+            return None
+        
+        state = self._store.get(("job", job_id), count=False)
+        if state is None or (state["finished"] is not None and state["finished"] < time.time() - self.ttl):
+            return None
+        return state
+    
+    def stats(self) -> Dict:
+        """Get job counts per status and the queue depth"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "jobs": counts
+        }
+    
+    def _prune(self):
+        """Forget finished jobs older than the TTL"""
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.is_expired(self.ttl)]
+            for job_id in expired:
+                del self._jobs[job_id]
+    
+    def _run(self):
+        """Worker loop"""
+        while True:
+            job = self._queue.get()
+            try:
+                self._process(job)
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                if job.status == "running":
+                    job.status = "done"
+                job.finished = time.time()
+                self._publish(job)
+    
+    def _publish(self, job: Job):
+        """Write the job's state to the shared store (if any)"""
+        if self._store is not None:
+            self._store.put(("job", job.id), job.to_dict())
+    
+    def _process(self, job: Job):
+        """Generate a job chunk by chunk, publishing results as it goes"""
+        job.status = "running"
+        job.started = time.time()
+        self._publish(job)
+        logger.info(f"Running job {job.id} ({len(job.items)} item(s))")
+        
+        for start in range(0, len(job.items), self.chunk_size):
+            by_language = {}
+            for index in range(start, min(start + self.chunk_size, len(job.items))):
+                by_language.setdefault(job.items[index]["language"], []).append(index)
+            
+            for language, indices in by_language.items():
+                generator = self._get_generator(language)
+                with self._inline():
+                    poems = generator.generate_many([job.items[i] for i in indices], job.profile)
+                for index, item_poems in zip(indices, poems):
+                    job.results[index] = {"index": index, "poems": item_poems, **job.items[index]}
+                job.completed += len(indices)
+                self._publish(job)
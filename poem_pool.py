@@ -0,0 +1,189 @@
+"""
+Background pool of pre-generated poems for the Bijoy Dibosh Poetry Generator
+Keeps ready-made model poems for every (language, theme) so requests for the
+standard themes can be answered without running the model inline
+"""
+
+import os
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class PoemPool:
+    """
+    Per-(language, theme) pools of ready-made poems, refilled in the background
+    
+    A pool that drops below low_water is refilled up to high_water by a
+    daemon thread, one batched generate_many() call at a time and only while
+    the CPU is idle: no inline generation in flight and the load average
+    below max_load per core. Serving from the pool is an O(1) deque pop.
+    """
+    
+    def __init__(
+        self,
+        get_generator: Callable,
+        languages: Optional[List[str]] = None,
+        themes: Optional[List[str]] = None,
+        low_water: Optional[int] = None,
+        high_water: Optional[int] = None
+    ):
+        """
+        Initialize the pool
+        
+        Args:
+            get_generator: Callable returning the generator for a language
+            languages: Languages to pool (default: english and bengali)
+            themes: Standard themes to pool (default: config.THEME_ALIASES)
+            low_water: Refill a pool once it holds fewer poems than this
+            high_water: Stop refilling once a pool holds this many poems
+        """
+        self._get_generator = get_generator
+        self.low_water = low_water or config.POOL_CONFIG["low_water"]
+        self.high_water = high_water or config.POOL_CONFIG["high_water"]
+        self.refill_batch = config.POOL_CONFIG["refill_batch"]
+        self.max_load = config.POOL_CONFIG["max_load"]
+        self.poll_interval = config.POOL_CONFIG["poll_interval_s"]
+        
+        languages = languages or ["english", "bengali"]
+        themes = themes or list(config.THEME_ALIASES)
+        self._pools = {(language, theme): deque() for language in languages for theme in themes}
+        self._refilling = set(self._pools)  # Start by filling every pool
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._in_flight = 0
+        self._thread = None
+        self._pid = None    # Process the refill thread runs in (threads don't survive fork)
+        self.hits = 0
+        self.misses = 0
+    
+    def start(self):
+        """
+        Start the background refill thread (idempotent per process)
+        
+        Call it from the serving process, e.g. on its first request: a
+        thread started before a fork (gunicorn --preload) is not running in
+        the forked workers, so a forked child starts its own.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="poem-pool", daemon=True)
+            self._thread.start()
+        logger.info(f"Poem pool started ({len(self._pools)} pools, "
+                    f"low/high water {self.low_water}/{self.high_water})")
+    
+    def take(self, language: str, theme: str, count: int = 1) -> Optional[List[str]]:
+        """
+        Take count poems for a normalized theme, or None if not enough are ready
+        
+        All-or-nothing, so a request never mixes pooled and inline poems.
+        """
+        key = (language, theme)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None or len(pool) < count:
+                self.misses += 1
+                return None
+            poems = [pool.popleft() for _ in range(count)]
+            self.hits += 1
+            if len(pool) < self.low_water and key not in self._refilling:
+                self._refilling.add(key)
+                self._wakeup.set()
+        return poems
+    
+    @contextmanager
+    def inline(self):
+        """Mark an inline (non-pooled) generation so refills back off"""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+    
+    def depths(self) -> Dict[str, int]:
+        """Get the number of ready poems per "language/theme" pool"""
+        with self._lock:
+            return {f"{language}/{theme}": len(pool) for (language, theme), pool in self._pools.items()}
+    
+    def stats(self) -> Dict:
+        """Get pool depths and hit/miss counters"""
+        depths = self.depths()
+        with self._lock:
+            return {
+                "depths": depths,
+                "total": sum(depths.values()),
+                "empty_pools": sum(1 for depth in depths.values() if depth == 0),
+                "refilling": len(self._refilling),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+    
+    def _cpu_idle(self) -> bool:
+        """Whether there is spare CPU for background generation"""
+        with self._lock:
+            if self._in_flight:
+                return False
+        try:
+            load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):
+            return True  # No load average on this platform
+        return load < self.max_load
+    
+    def _next_to_refill(self):
+        """Pick the emptiest pool that needs refilling (None if all are full)"""
+        with self._lock:
+            if not self._refilling:
+                return None
+            return min(self._refilling, key=lambda key: len(self._pools[key]))
+    
+    def _run(self):
+        """Refill loop"""
+        while True:
+            key = self._next_to_refill()
+            if key is None:
+                self._wakeup.wait(timeout=self.poll_interval)
+                self._wakeup.clear()
+                continue
+            
+            if not self._cpu_idle():
+                time.sleep(self.poll_interval)
+                continue
+            
+            try:
+                self._refill(*key)
+            except Exception as e:
+                logger.error(f"Poem pool refill failed for {key}: {e}")
+                time.sleep(self.poll_interval)
+    
+    def _refill(self, language: str, theme: str):
+        """Generate one batch of poems into a pool"""
+        generator = self._get_generator(language)
+        
+        # Template poems are instant; pooling only pays off for model output
+        if generator._model_disabled():
+            with self._lock:
+                self._refilling.discard((language, theme))
+            return
+        
+        with self._lock:
+            missing = self.high_water - len(self._pools[(language, theme)])
+        count = max(1, min(self.refill_batch, missing))
+        poems = generator.generate_many([{"theme": theme, "num_outputs": count}])[0]
+        
+        with self._lock:
+            pool = self._pools[(language, theme)]
+            pool.extend(poems)
+            if len(pool) >= self.high_water:
+                self._refilling.discard((language, theme))
@@ -5,56 +5,283 @@ Falls back to template-based generation in low-memory environments
 """
 
 import json
+import time
 import random
 import logging
-from typing import List, Optional, Dict
+import threading
+import importlib.util
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Dict, Tuple
 import config
+from caching import LRUCache
+from cache_backends import create_result_cache
+from backends import get_backend
 
-# Try to import ML libraries (optional for template-based generation)
-try:
-    import torch
-    from transformers import (
-        AutoTokenizer, 
-        AutoModelForCausalLM,
-        AutoModelForSeq2SeqLM,
-        pipeline
-    )
-    ML_AVAILABLE = True
-except ImportError:
-    ML_AVAILABLE = False
-    torch = None
+# ML libraries are optional (template-based generation works without them)
+# and are imported lazily on first model load: torch/transformers cost
+# seconds of import time and hundreds of MB of RSS, which template-only
+# serving (SKIP_MODEL_LOADING/RENDER) should never pay
+ML_AVAILABLE = (
+    importlib.util.find_spec("torch") is not None
+    and importlib.util.find_spec("transformers") is not None
+)
+torch = None
+AutoTokenizer = None
+BaseModelOutput = None
+DynamicCache = None
+
+# Serializes the first import: transformers' lazy module is not safe to
+# import from several threads at once
+_import_lock = threading.Lock()
+
+# from_pretrained temporarily patches global torch state (meta-device weight
+# init), so loads for different languages must not overlap either
+_from_pretrained_lock = threading.Lock()
+
+
+class _RNGLock:
+    """
+    Guards torch's process-wide RNG during generation
+    
+    Unseeded generations hold it shared and run concurrently. A seeded
+    generation holds it exclusively, so nothing else draws from the RNG
+    between its manual_seed() and the end of its generate call. Waiting
+    seeded calls hold off new shared holders so they aren't starved.
+    Not reentrant.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+    
+    @contextmanager
+    def shared(self):
+        with self._condition:
+            while self._exclusive or self._waiting:
+                self._condition.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                self._condition.notify_all()
+    
+    @contextmanager
+    def exclusive(self):
+        with self._condition:
+            self._waiting += 1
+            while self._exclusive or self._shared:
+                self._condition.wait()
+            self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+# Every generate call holds this: shared when unseeded, exclusive when seeded
+_rng_lock = _RNGLock()
+
+# Forward passes per thread, counted by hooks on the main and draft models
+# during speculative decoding to measure how many drafted tokens are accepted
+_forward_counts = threading.local()
+
+
+def _count_forward(key: str):
+    """Forward hook incrementing this thread's _forward_counts.<key>"""
+    def hook(module, args, output):
+        setattr(_forward_counts, key, getattr(_forward_counts, key, 0) + 1)
+    return hook
+
+
+def _import_ml() -> bool:
+    """Import torch and transformers on first use; False if unavailable"""
+    if torch is not None:
+        return True
+    if not ML_AVAILABLE:
+        return False
+    
+    with _import_lock:
+        if torch is not None:
+            return True  # Imported by another thread while we waited
+        if not ML_AVAILABLE:
+            return False
+        return _import_ml_locked()
+
+
+def _import_ml_locked() -> bool:
+    """Import torch and transformers (caller holds _import_lock)"""
+    global torch, AutoTokenizer
+    global BaseModelOutput, DynamicCache, ML_AVAILABLE
+    
+    try:
+        import torch as _torch
+        from transformers import AutoTokenizer as _AutoTokenizer
+        from transformers.modeling_outputs import BaseModelOutput as _BaseModelOutput
+    except ImportError as e:
+        logger.warning(f"Could not import ML libraries: {e}")
+        ML_AVAILABLE = False
+        return False
+    
+    try:
+        from transformers import DynamicCache as _DynamicCache
+    except ImportError:
+        _DynamicCache = None  # Older transformers: pass legacy tuples
+    
+    AutoTokenizer = _AutoTokenizer
+    BaseModelOutput = _BaseModelOutput
+    DynamicCache = _DynamicCache
+    torch = _torch
+    return True
 
 # Setup logging
 logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 
+def _prefix_state_nbytes(state) -> int:
+    """Approximate memory held by a cached (prefix ids, past_key_values) pair"""
+    prefix_ids, past = state
+    total = prefix_ids.numel() * prefix_ids.element_size()
+    for layer in past:
+        for tensor in layer:
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def _stack_past(pasts: List, length: int, repeats: int = 1):
+    """
+    Stack per-row legacy past_key_values into one batch
+    
+    Each row's states are left-padded along the sequence axis to length
+    and repeated for beam search. Returns a Cache object if supported.
+    """
+    stacked = tuple(
+        tuple(
+            torch.cat([
+                torch.nn.functional.pad(past[layer_idx][slot], (0, 0, length - past[layer_idx][slot].shape[2], 0))
+                for past in pasts
+            ], dim=0).repeat_interleave(repeats, dim=0)
+            for slot in range(2)
+        )
+        for layer_idx in range(len(pasts[0]))
+    )
+    if DynamicCache is None:
+        return stacked
+    
+    # Built layer by layer: from_legacy_cache is gone in transformers 5
+    cache = DynamicCache()
+    for layer_idx, (key, value) in enumerate(stacked):
+        cache.update(key, value, layer_idx)
+    return cache
+
+
+def _bucket_groups(lengths: List[int], buckets: List[int], min_batch_size: int) -> List[Tuple[int, List[int]]]:
+    """
+    Group prompt indices by the smallest bucket holding their token length
+    
+    Groups smaller than min_batch_size are carried up into the next larger
+    bucket; whatever is left at the end joins the last group (in the largest
+    bucket used), so it doesn't cost a generate call of its own.
+    
+    Returns:
+        (bucket length, prompt indices) pairs, shortest bucket first
+    """
+    by_bucket = {}
+    for index, length in enumerate(lengths):
+        bucket = next((b for b in buckets if b >= length), buckets[-1])
+        by_bucket.setdefault(bucket, []).append(index)
+    
+    groups = []
+    carried = []
+    for bucket in sorted(by_bucket):
+        carried += by_bucket[bucket]
+        if len(carried) >= min_batch_size:
+            groups.append((bucket, carried))
+            carried = []
+    if carried and groups:
+        groups[-1] = (max(by_bucket), groups[-1][1] + carried)
+    elif carried:
+        groups.append((max(by_bucket), carried))
+    return groups
+
+
+def get_generation_profile(name: Optional[str] = None) -> Dict:
+    """Get generation settings for a named profile (default if None)"""
+    name = name or config.DEFAULT_GENERATION_PROFILE
+    if name not in config.GENERATION_PROFILES:
+        raise ValueError(
+            f"Unknown generation profile '{name}' "
+            f"(choose from: {', '.join(config.GENERATION_PROFILES)})"
+        )
+    return config.GENERATION_PROFILES[name]
+
+
 class BijoyPoetryGenerator:
     """
     AI-powered poetry generator for Victory Day (Bijoy Dibosh)
     """
     
-    def __init__(self, language: str = "english", use_gpu: bool = None):
+    def __init__(self, language: str = "english", use_gpu: bool = None, result_cache=None):
         """
         Initialize the poetry generator
         
         Args:
             language: "bengali" or "english"
             use_gpu: Use GPU if available (default: auto-detect)
+            result_cache: Shared result cache backend (default: built from
+                config.RESULT_CACHE_CONFIG)
         """
         self.language = language.lower()
-        self.device = self._get_device(use_gpu)
+        self.use_gpu = use_gpu
+        self.backend = get_backend(config.MODEL_CONFIG[self.language].get("backend", "torch"))
+        self.device = "cpu"  # Resolved when the model is loaded
         self.model = None
         self.tokenizer = None
+        self.is_seq2seq = False
+        self.draft_model = None         # Speculative decoding draft, see _load_draft_model
+        self.draft_model_name = None
+        self.speculative_counts = {"calls": 0, "drafted": 0, "accepted": 0, "generated": 0, "verify_steps": 0}
+        self.padding_counts = {"batches": 0, "tokens": 0, "padded_tokens": 0}
+        self.recent_batches = deque(maxlen=config.LENGTH_BUCKETING_CONFIG["history"])
+        self.max_new_tokens = config.GENERATION_CONFIG["max_new_tokens"]
+        self.prefix_cache = None
+        if config.PREFIX_CACHE_CONFIG["enabled"]:
+            self.prefix_cache = LRUCache(
+                max_bytes=config.PREFIX_CACHE_CONFIG["max_bytes"],
+                sizeof=_prefix_state_nbytes
+            )
+        self._load_started = False
+        self._load_attempted = False
+        self.warm_up_seconds = None     # Set once warm_up() has run
+        self._load_lock = threading.Lock()
+        self._siblings = {}             # Generators for other languages, see _for_language
+        self._siblings_lock = threading.Lock()
+        self._model_latency = None      # EWMA of model call seconds
+        self._last_model_call = 0.0     # Monotonic time of last model call
+        self._stats_lock = threading.Lock()
+        self.path_counts = {"model": 0, "template": 0, "deadline_skipped": 0, "deadline_fallback": 0}
+        self.result_cache = result_cache if result_cache is not None else create_result_cache()
+        self.encoder_cache = None
+        if config.ENCODER_CACHE_CONFIG["enabled"]:
+            self.encoder_cache = LRUCache(
+                max_entries=config.ENCODER_CACHE_CONFIG["max_entries"]
+            )
         self.training_data = self._load_training_data()
         self.themes_data = self._load_themes_data()
+        self._build_index()
         
         logger.info(f"Initializing Bijoy Poetry Generator for {language}")
-        if ML_AVAILABLE:
-            logger.info(f"Using device: {self.device}")
-        else:
+        if not ML_AVAILABLE:
             logger.info("ML libraries not available - using template-based generation only")
-        
+    
     def _get_device(self, use_gpu: Optional[bool]) -> str:
         """Determine which device to use for inference"""
         if not ML_AVAILABLE or torch is None:
@@ -81,69 +308,240 @@ class BijoyPoetryGenerator:
             logger.warning("Themes data not found, using empty dataset")
             return {"themes": {}}
     
+    def _build_index(self):
+        """
+        Precompute theme and poem lookups so per-poem work stays O(1)
+        
+        Builds a reverse alias map (lowercased alias -> standard theme) and
+        per-language, per-theme poem buckets from the loaded training data.
+        """
+        # Standard theme names win over aliases; otherwise the first theme
+        # listing an alias wins (matches the original linear scan order)
+        self._theme_lookup = {theme: theme for theme in config.THEME_ALIASES}
+        for standard_theme, aliases in config.THEME_ALIASES.items():
+            for alias in aliases:
+                self._theme_lookup.setdefault(alias.lower(), standard_theme)
+        
+        self._poems_by_language = {}
+        self._poems_by_theme = {}
+        for language in ("bengali", "english"):
+            poems = self.training_data.get(f"{language}_poems", [])
+            buckets = {}
+            for poem in poems:
+                buckets.setdefault(poem.get("theme"), []).append(poem)
+            self._poems_by_language[language] = poems
+            self._poems_by_theme[language] = buckets
+    
+    def _get_poems(self, theme: str) -> List[Dict]:
+        """Get training poems for a normalized theme (all poems if none match)"""
+        language = "bengali" if self.language == "bengali" else "english"
+        poems = self._poems_by_theme[language].get(theme)
+        if poems:
+            return poems
+        return self._poems_by_language[language]
+    
+    def _model_disabled(self) -> bool:
+        """Whether model-based generation is switched off for this process"""
+        import os
+        return (
+            bool(os.environ.get('RENDER') or os.environ.get('SKIP_MODEL_LOADING'))
+            or not ML_AVAILABLE
+            or not self.backend.enabled
+        )
+    
     def _load_model(self):
-        """Load the appropriate model for the selected language"""
+        """
+        Load the appropriate model for the selected language
+        
+        Safe to call from many threads: the first caller loads while the
+        others wait, and later calls return immediately. The model is only
+        published once its tokenizer and token budget are set up.
+        """
         # Skip model loading in low-memory environments (Render free tier)
         import os
-        if os.environ.get('RENDER') or os.environ.get('SKIP_MODEL_LOADING'):
+        if os.environ.get('RENDER') or os.environ.get('SKIP_MODEL_LOADING') or not self.backend.enabled:
             logger.info("Skipping model loading (using template-based generation)")
-            self.model = None
-            self.tokenizer = None
             return
         
-        if self.model is not None:
-            return  # Already loaded
+        if self.model is not None or self._load_attempted:
+            return  # Already loaded (or failed to load)
+        
+        with self._load_lock:
+            if self.model is not None or self._load_attempted:
+                return  # Loaded by another thread while we waited
+            try:
+                self._load_model_locked()
+            finally:
+                self._load_attempted = True
+    
+    def _load_model_locked(self):
+        """Load the model and tokenizer (caller holds _load_lock)"""
+        with _from_pretrained_lock:
+            self._load_weights()
+    
+    def _load_weights(self):
+        """Load the model and tokenizer (caller holds _from_pretrained_lock)"""
+        if not _import_ml():
+            return  # Template-based generation only
+        
+        self.device = self._get_device(self.use_gpu)
+        logger.info(f"Using device: {self.device}")
         
         model_config = config.MODEL_CONFIG[self.language]
         model_name = model_config["model_name"]
         
-        logger.info(f"Loading model: {model_name}")
+        logger.info(f"Loading model: {model_name} ({self.backend.name} backend)")
         
         try:
             # Try loading the model
-            self.tokenizer = AutoTokenizer.from_pretrained(
+            tokenizer = AutoTokenizer.from_pretrained(
                 model_config["tokenizer_name"],
                 trust_remote_code=True
             )
             
             # Determine model type (CausalLM for GPT-style, Seq2SeqLM for T5-style)
-            if "t5" in model_name.lower() or "mt5" in model_name.lower():
-                self.model = AutoModelForSeq2SeqLM.from_pretrained(
-                    model_name,
-                    trust_remote_code=True
-                ).to(self.device)
-            else:
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    model_name,
-                    trust_remote_code=True
-                ).to(self.device)
+            is_seq2seq = "t5" in model_name.lower() or "mt5" in model_name.lower()
+            model = self.backend.load(model_name, is_seq2seq, self.device)
+            if not is_seq2seq:
+                # Decoder-only models must be left-padded for batched generation
+                tokenizer.padding_side = "left"
             
-            logger.info("Model loaded successfully")
+            # GPT-2 style tokenizers ship without a pad token
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            
+            self.draft_model = self._load_draft_model(model, tokenizer, is_seq2seq, model_config)
+            self.tokenizer = tokenizer
+            self.is_seq2seq = is_seq2seq
+            self.max_new_tokens = self._get_token_budget(model_config)
+            self.model = model  # Publish last: other threads check self.model
             
+            logger.info("Model loaded successfully")
+        
         except Exception as e:
             logger.error(f"Error loading model {model_name}: {e}")
             logger.info("Falling back to template-based generation")
             self.model = None
             self.tokenizer = None
     
+    def _load_draft_model(self, model, tokenizer, is_seq2seq: bool, model_config: Dict):
+        """
+        Load the speculative decoding draft model (None when not configured)
+        
+        The draft proposes tokens by their ids, so it must share the main
+        model's tokenizer; otherwise speculative decoding is disabled and
+        generation runs on the main model alone.
+        """
+        draft_name = model_config.get("draft_model")
+        if not config.SPECULATIVE_CONFIG["enabled"] or not draft_name:
+            return None
+        if not self.backend.assisted_decoding:
+            logger.info(f"{self.backend.name} backend does not support draft models, speculative decoding disabled")
+            return None
+        
+        try:
+            draft_tokenizer = AutoTokenizer.from_pretrained(draft_name, trust_remote_code=True)
+            draft_is_seq2seq = "t5" in draft_name.lower()
+            if draft_is_seq2seq != is_seq2seq or draft_tokenizer.get_vocab() != tokenizer.get_vocab():
+                logger.warning(
+                    f"Draft model {draft_name} does not share {model_config['model_name']}'s tokenizer, "
+                    "speculative decoding disabled"
+                )
+                return None
+            draft = self.backend.load(draft_name, is_seq2seq, self.device)
+        except Exception as e:
+            logger.warning(f"Error loading draft model {draft_name}: {e}, speculative decoding disabled")
+            return None
+        
+        draft.generation_config.num_assistant_tokens = config.SPECULATIVE_CONFIG["num_assistant_tokens"]
+        model.register_forward_hook(_count_forward("verify"))
+        draft.register_forward_hook(_count_forward("draft"))
+        self.draft_model_name = draft_name
+        logger.info(f"Speculative decoding with draft model {draft_name}")
+        return draft
+    
+    def _uses_draft(self, batch_size: int, profile: Optional[str]) -> bool:
+        """Whether a generate call gets the draft model (one sequence, no beams)"""
+        return (
+            self.draft_model is not None
+            and batch_size == 1
+            and get_generation_profile(profile)["num_beams"] == 1
+        )
+    
+    def _record_assisted(self, generated: int):
+        """Add one speculative decoding call's token counts to the stats"""
+        verify_steps = getattr(_forward_counts, "verify", 0)
+        drafted = getattr(_forward_counts, "draft", 0)
+        # Each verification step yields the accepted draft tokens plus one of its own
+        accepted = max(0, min(drafted, generated - verify_steps))
+        with self._stats_lock:
+            counts = self.speculative_counts
+            counts["calls"] += 1
+            counts["drafted"] += drafted
+            counts["accepted"] += accepted
+            counts["generated"] += generated
+            counts["verify_steps"] += verify_steps
+    
+    def _record_padding(self, attention_mask):
+        """Add one batch's real vs. padded prompt tokens to the stats"""
+        tokens = int(attention_mask.sum())
+        padded_tokens = attention_mask.numel()
+        with self._stats_lock:
+            self.padding_counts["batches"] += 1
+            self.padding_counts["tokens"] += tokens
+            self.padding_counts["padded_tokens"] += padded_tokens
+            self.recent_batches.append({
+                "size": attention_mask.shape[0],
+                "length": attention_mask.shape[1],
+                "efficiency": tokens / padded_tokens
+            })
+    
+    def _get_token_budget(self, model_config: Dict) -> int:
+        """
+        Get max_new_tokens for this language, calibrated from the corpus
+        
+        Uses the longest 4-line poem in the training data (in tokens of the
+        loaded tokenizer) times a safety margin, clamped between the
+        configured minimum and GENERATION_CONFIG["max_new_tokens"]. A
+        "max_new_tokens" entry in MODEL_CONFIG overrides the calibration.
+        """
+        ceiling = config.GENERATION_CONFIG["max_new_tokens"]
+        if model_config.get("max_new_tokens"):
+            return model_config["max_new_tokens"]
+        if not config.TOKEN_BUDGET_CONFIG["enabled"]:
+            return ceiling
+        
+        lengths = []
+        for poem in self._poems_by_language[self.language]:
+            text = self._format_as_4_lines(poem["text"]) + "\n"
+            lengths.append(len(self.tokenizer(text, add_special_tokens=False)["input_ids"]))
+        if not lengths:
+            return ceiling
+        
+        budget = int(max(lengths) * config.TOKEN_BUDGET_CONFIG["margin"])
+        budget = max(config.TOKEN_BUDGET_CONFIG["min_new_tokens"], min(budget, ceiling))
+        logger.info(f"Token budget for {self.language}: {budget} new tokens")
+        return budget
+    
     def _normalize_theme(self, theme: str) -> str:
         """Normalize theme input to standard theme name"""
         theme_lower = theme.lower().strip()
         
-        # Check if it's already a valid theme
-        if theme_lower in config.THEME_ALIASES:
-            return theme_lower
-        
-        # Check aliases
-        for standard_theme, aliases in config.THEME_ALIASES.items():
-            if theme_lower in [alias.lower() for alias in aliases]:
-                return standard_theme
-        
         # Default to the input if no match found
-        return theme_lower
+        return self._theme_lookup.get(theme_lower, theme_lower)
     
-    def _get_prompt(self, theme: str) -> str:
+    def _get_prompt(self, theme: str, rng: Optional[random.Random] = None) -> str:
         """Generate a prompt for the model based on theme"""
+        return "".join(self._get_prompt_parts(theme, rng))
+    
+    def _get_prompt_parts(self, theme: str, rng: Optional[random.Random] = None) -> Tuple[str, str]:
+        """
+        Generate a prompt split into its few-shot prefix and theme suffix
+        
+        Returns:
+            (example block, or "" if there are no examples; theme prompt)
+        """
+        rng = rng or random
         normalized_theme = self._normalize_theme(theme)
         template = config.PROMPT_TEMPLATES[self.language]
         
@@ -151,109 +549,482 @@ class BijoyPoetryGenerator:
         if normalized_theme in self.themes_data.get("themes", {}):
             theme_info = self.themes_data["themes"][normalized_theme]
             if "prompts" in theme_info and theme_info["prompts"]:
-                base_prompt = random.choice(theme_info["prompts"])
+                base_prompt = rng.choice(theme_info["prompts"])
             else:
                 base_prompt = f"A Victory Day poem about {theme}"
         else:
             base_prompt = f"A Victory Day poem about {theme}"
         
         # Add examples from training data
-        examples = self._get_example_poems(normalized_theme, num_examples=2)
+        examples = self._get_example_poems(normalized_theme, num_examples=2, rng=rng)
         if examples:
+            # The separator starts the suffix: a trailing "\n\n" can tokenize
+            # differently on its own than when followed by text
             examples_text = "\n\n".join(examples)
-            return f"{examples_text}\n\n{base_prompt}:\n"
+            return examples_text, f"\n\n{base_prompt}:\n"
         
-        return template["prefix"].format(theme=theme) + base_prompt + "\n"
+        return "", template["prefix"].format(theme=theme) + base_prompt + "\n"
     
-    def _get_example_poems(self, theme: str, num_examples: int = 2) -> List[str]:
+    def _get_example_poems(
+        self,
+        theme: str,
+        num_examples: int = 2,
+        rng: Optional[random.Random] = None
+    ) -> List[str]:
         """Get example poems matching the theme from training data"""
-        if self.language == "bengali":
-            poems = self.training_data.get("bengali_poems", [])
-        else:
-            poems = self.training_data.get("english_poems", [])
-        
-        # Filter by theme
-        matching_poems = [p["text"] for p in poems if p.get("theme") == theme]
+        rng = rng or random
         
-        # If no exact matches, get random poems
-        if not matching_poems:
-            matching_poems = [p["text"] for p in poems]
+        # Theme bucket, or all poems if no exact matches
+        poems = self._get_poems(theme)
         
         # Return random selection
-        if len(matching_poems) <= num_examples:
-            return matching_poems
-        return random.sample(matching_poems, num_examples)
+        if len(poems) <= num_examples:
+            return [p["text"] for p in poems]
+        return [p["text"] for p in rng.sample(poems, num_examples)]
     
     def _generate_with_model(self, prompt: str) -> str:
         """Generate text using the transformer model"""
+        generated = self._generate_batch_with_model([prompt])
+        if generated is None:
+            return self._generate_template_based(prompt)
+        return generated[0]
+    
+    def _generate_batch_with_model(
+        self,
+        prompts: List[str],
+        prefixes: Optional[List[str]] = None,
+        profile: Optional[str] = None,
+        max_time: Optional[float] = None,
+        seed: Optional[int] = None
+    ) -> Optional[List[str]]:
+        """
+        Generate text for several prompts with batched model.generate calls
+        
+        Prompts are tokenized together with padding and decoded in bulk, so
+        a request for N poems costs roughly one batched forward pass per
+        decoding step instead of N separate generations.
+        
+        Args:
+            prompts: Full prompts to complete
+            prefixes: Optional few-shot prefix of each prompt; prompts sharing
+                a prefix reuse its cached key/value states (causal models only)
+            profile: Generation profile name (default: DEFAULT_GENERATION_PROFILE)
+            max_time: Stop decoding after this many seconds (optional)
+            seed: Seed torch's RNG first so sampling is reproducible; seeded
+                calls wait for all other generations in the process (optional)
+        
+        Returns:
+            One generated text per prompt, or None if the model is unavailable
+            or generation failed (callers fall back to templates)
+        """
         self._load_model()
         
         if self.model is None or self.tokenizer is None:
-            return self._generate_template_based(prompt)
+            return None
         
         try:
-            # Tokenize input
-            inputs = self.tokenizer(
-                prompt,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512
-            ).to(self.device)
-            
-            # Generate
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=config.GENERATION_CONFIG["max_new_tokens"],
-                    temperature=config.GENERATION_CONFIG["temperature"],
-                    top_k=config.GENERATION_CONFIG["top_k"],
-                    top_p=config.GENERATION_CONFIG["top_p"],
-                    repetition_penalty=config.GENERATION_CONFIG["repetition_penalty"],
-                    do_sample=config.GENERATION_CONFIG["do_sample"],
-                    num_beams=config.GENERATION_CONFIG["num_beams"],
-                    early_stopping=config.GENERATION_CONFIG["early_stopping"],
-                    pad_token_id=self.tokenizer.eos_token_id
-                )
-            
-            # Decode output
-            generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Extract only the generated part (remove prompt)
-            if generated_text.startswith(prompt):
-                generated_text = generated_text[len(prompt):].strip()
-            
-            return generated_text
-            
+            if seed is not None:
+                with _rng_lock.exclusive():
+                    torch.manual_seed(seed)
+                    return self._route_batch(prompts, prefixes, profile, max_time)
+            with _rng_lock.shared():
+                return self._route_batch(prompts, prefixes, profile, max_time)
+        
         except Exception as e:
             logger.error(f"Error during generation: {e}")
-            return self._generate_template_based(prompt)
+            return None
+    
+    def _route_batch(
+        self,
+        prompts: List[str],
+        prefixes: Optional[List[str]],
+        profile: Optional[str],
+        max_time: Optional[float]
+    ) -> List[str]:
+        """Route a batch to the encoder cache, prefix cache or plain generate"""
+        # Speculative decoding runs through plain generate
+        if self._uses_draft(len(prompts), profile):
+            return self._run_generate(prompts, profile, max_time)
+        
+        reuse_kv = self.backend.reuses_kv_cache
+        if self.is_seq2seq:
+            if self.encoder_cache is not None and reuse_kv:
+                return self._run_generate_from_encoder_cache(prompts, profile, max_time)
+            return self._run_generate(prompts, profile, max_time)
+        
+        if self.prefix_cache is None or not prefixes or not reuse_kv:
+            return self._run_generate(prompts, profile, max_time)
+        
+        # Prompts whose encoding starts with their prefix's cached tokens share
+        # one generate call; the rest (no examples, a prefix whose last tokens
+        # merge with the suffix, or too long) are encoded in full
+        encoded = self.tokenizer(prompts)["input_ids"]
+        cached = []
+        plain = []
+        for index, (prefix, ids) in enumerate(zip(prefixes, encoded)):
+            if prefix and len(ids) <= 512:
+                prefix_ids = self._get_prefix_state(prefix)[0][0].tolist()
+                if len(ids) > len(prefix_ids) and ids[:len(prefix_ids)] == prefix_ids:
+                    cached.append(index)
+                    continue
+            plain.append(index)
+        
+        results = [None] * len(prompts)
+        if cached:
+            texts = self._run_generate_from_prefix(
+                [encoded[i] for i in cached],
+                [prefixes[i] for i in cached],
+                profile,
+                max_time
+            )
+            for index, text in zip(cached, texts):
+                results[index] = text
+        if plain:
+            texts = self._run_generate([prompts[i] for i in plain], profile, max_time)
+            for index, text in zip(plain, texts):
+                results[index] = text
+        return results
+    
+    def _generation_kwargs(
+        self,
+        prompt_length: int = 0,
+        profile: Optional[str] = None,
+        max_time: Optional[float] = None
+    ) -> Dict:
+        """
+        Keyword arguments for model.generate from a generation profile
+        
+        Args:
+            prompt_length: Leading tokens of each sequence seen by stopping
+                criteria that belong to the prompt (0 for seq2seq decoders)
+            profile: Generation profile name (default: DEFAULT_GENERATION_PROFILE)
+            max_time: Stop decoding after this many seconds (optional)
+        """
+        settings = get_generation_profile(profile)
+        from transformers import StoppingCriteriaList
+        from stopping_criteria import LineStoppingCriteria
+        
+        # Stop once 4 usable lines exist; _format_as_4_lines drops the rest
+        stopping_criteria = StoppingCriteriaList([
+            LineStoppingCriteria(
+                self.tokenizer,
+                prompt_length,
+                num_lines=4,
+                min_line_length=config.POETRY_FORMAT["min_line_length"]
+            )
+        ])
+        
+        kwargs = {
+            "max_new_tokens": min(self.max_new_tokens, settings["max_new_tokens"]),
+            "stopping_criteria": stopping_criteria,
+            "temperature": settings["temperature"],
+            "top_k": settings["top_k"],
+            "top_p": settings["top_p"],
+            "repetition_penalty": settings["repetition_penalty"],
+            "do_sample": settings["do_sample"],
+            "num_beams": settings["num_beams"],
+            "early_stopping": settings["early_stopping"],
+            "pad_token_id": self.tokenizer.pad_token_id
+        }
+        if max_time is not None:
+            kwargs["max_time"] = max_time
+        return kwargs
     
-    def _generate_template_based(self, theme: str) -> str:
+    def _run_generate(
+        self,
+        prompts: List[str],
+        profile: Optional[str] = None,
+        max_time: Optional[float] = None
+    ) -> List[str]:
+        """
+        Tokenize prompts into padded batches, generate and decode
+        
+        With length bucketing, prompts are grouped by token length (see
+        _bucket_groups) and each group is padded to its longest prompt, or
+        to its bucket's fixed length for backends that need static shapes;
+        otherwise they form one batch padded to the longest prompt.
+        """
+        settings = config.LENGTH_BUCKETING_CONFIG
+        if not settings["enabled"]:
+            return self._run_generate_padded(prompts, profile, max_time)
+        
+        buckets = sorted(settings["buckets"])
+        lengths = [
+            len(ids) for ids in
+            self.tokenizer(prompts, truncation=True, max_length=buckets[-1])["input_ids"]
+        ]
+        groups = _bucket_groups(lengths, buckets, settings["min_batch_size"])
+        static = self.backend.static_shapes
+        
+        start = time.monotonic()
+        results = [None] * len(prompts)
+        for bucket, indices in groups:
+            remaining = None
+            if max_time is not None:
+                remaining = max(0.0, max_time - (time.monotonic() - start))
+            texts = self._run_generate_padded(
+                [prompts[i] for i in indices], profile, remaining, bucket if static else None
+            )
+            for index, text in zip(indices, texts):
+                results[index] = text
+        return results
+    
+    def _run_generate_padded(
+        self,
+        prompts: List[str],
+        profile: Optional[str] = None,
+        max_time: Optional[float] = None,
+        length: Optional[int] = None
+    ) -> List[str]:
+        """Generate for prompts padded to length tokens (default: the longest prompt)"""
+        inputs = self.tokenizer(
+            prompts,
+            return_tensors="pt",
+            padding="max_length" if length else True,
+            truncation=True,
+            max_length=length or 512
+        ).to(self.device)
+        self._record_padding(inputs["attention_mask"])
+        
+        prompt_length = 0 if self.is_seq2seq else inputs["input_ids"].shape[1]
+        kwargs = self._generation_kwargs(prompt_length, profile, max_time)
+        assisted = self._uses_draft(len(prompts), profile)
+        if assisted:
+            kwargs["assistant_model"] = self.draft_model
+            _forward_counts.verify = _forward_counts.draft = 0
+        
+        with torch.no_grad():
+            outputs = self.model.generate(**inputs, **kwargs)
+        
+        # Causal models echo the (left-padded) prompt; keep only new tokens
+        outputs = outputs[:, prompt_length:]
+        
+        if assisted:
+            # Seq2seq outputs start with the decoder start token
+            self._record_assisted(outputs.shape[1] - (1 if self.is_seq2seq else 0))
+        
+        return self._decode(outputs)
+    
+    def _run_generate_from_prefix(
+        self,
+        encoded: List[List[int]],
+        prefixes: List[str],
+        profile: Optional[str] = None,
+        max_time: Optional[float] = None
+    ) -> List[str]:
+        """
+        Generate for prompts with few-shot prefixes, reusing their cached KV states
+        
+        Prompts with different prefixes share one batch. Each row is laid out
+        as [padding, prefix, padding, suffix]: prefix key/value states come
+        from the prefix cache, left-padded to the longest prefix, and only
+        the suffix tokens are run through the model. Padding is masked out
+        and position ids follow the attention mask, so each row matches
+        encoding its full prompt alone.
+        
+        Args:
+            encoded: Token ids of each full prompt, starting with its prefix's
+            prefixes: Few-shot prefix of each prompt
+        """
+        states = {prefix: self._get_prefix_state(prefix) for prefix in set(prefixes)}
+        prefix_ids = [states[prefix][0][0].tolist() for prefix in prefixes]
+        suffix_ids = [ids[len(prefix):] for ids, prefix in zip(encoded, prefix_ids)]
+        prefix_length = max(len(ids) for ids in prefix_ids)
+        suffix_length = max(len(ids) for ids in suffix_ids)
+        
+        pad_id = self.tokenizer.pad_token_id
+        rows = []
+        masks = []
+        for prefix, suffix in zip(prefix_ids, suffix_ids):
+            prefix_padding = prefix_length - len(prefix)
+            suffix_padding = suffix_length - len(suffix)
+            rows.append([pad_id] * prefix_padding + prefix + [pad_id] * suffix_padding + suffix)
+            masks.append([0] * prefix_padding + [1] * len(prefix) + [0] * suffix_padding + [1] * len(suffix))
+        
+        input_ids = torch.tensor(rows, device=self.device)
+        attention_mask = torch.tensor(masks, device=self.device)
+        self._record_padding(attention_mask)
+        kwargs = self._generation_kwargs(input_ids.shape[1], profile, max_time)
+        
+        # generate() expands inputs for beam search but not the cache itself
+        past_key_values = _stack_past([states[prefix][1] for prefix in prefixes], prefix_length, kwargs["num_beams"])
+        
+        with torch.no_grad():
+            outputs = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=past_key_values,
+                **kwargs
+            )
+        
+        return self._decode(outputs[:, input_ids.shape[1]:])
+    
+    def _get_prefix_state(self, prefix: str):
+        """Get (prefix token ids, legacy past_key_values) from cache or model"""
+        key = (self.language, prefix)
+        state = self.prefix_cache.get(key)
+        if state is not None:
+            return state
+        
+        # Special tokens as in the full prompt's encoding (e.g. a leading BOS)
+        prefix_ids = self.tokenizer(prefix, return_tensors="pt")["input_ids"].to(self.device)
+        
+        with torch.no_grad():
+            past = self.model(input_ids=prefix_ids, use_cache=True).past_key_values
+        if hasattr(past, "to_legacy_cache"):
+            past = past.to_legacy_cache()
+        elif hasattr(past, "layers"):
+            past = tuple((layer.keys, layer.values) for layer in past.layers)  # transformers 5
+        
+        state = (prefix_ids, past)
+        self.prefix_cache.put(key, state)
+        return state
+    
+    def _run_generate_from_encoder_cache(
+        self,
+        prompts: List[str],
+        profile: Optional[str] = None,
+        max_time: Optional[float] = None
+    ) -> List[str]:
+        """
+        Generate with a seq2seq model from cached encoder outputs
+        
+        Each prompt's encoder hidden states are looked up (or computed once)
+        and right-padded into a batch, so repeated prompts skip straight to
+        decoding.
+        """
+        states = [self._get_encoder_state(prompt) for prompt in prompts]
+        max_length = max(hidden.shape[1] for hidden, _ in states)
+        
+        hidden_states = []
+        attention_masks = []
+        for hidden, mask in states:
+            padding = max_length - hidden.shape[1]
+            hidden_states.append(torch.nn.functional.pad(hidden, (0, 0, 0, padding)))
+            attention_masks.append(torch.nn.functional.pad(mask, (0, padding)))
+        
+        encoder_outputs = BaseModelOutput(last_hidden_state=torch.cat(hidden_states, dim=0))
+        attention_mask = torch.cat(attention_masks, dim=0)
+        self._record_padding(attention_mask)
+        with torch.no_grad():
+            outputs = self.model.generate(
+                encoder_outputs=encoder_outputs,
+                attention_mask=attention_mask,
+                **self._generation_kwargs(0, profile, max_time)
+            )
+        
+        return self._decode(outputs)
+    
+    def _get_encoder_state(self, prompt: str):
+        """Get (encoder hidden states, attention mask) from cache or encoder"""
+        key = (self.language, prompt)
+        state = self.encoder_cache.get(key)
+        if state is not None:
+            return state
+        
+        inputs = self.tokenizer(
+            prompt,
+            return_tensors="pt",
+            truncation=True,
+            max_length=512
+        ).to(self.device)
+        
+        with torch.no_grad():
+            hidden = self.model.get_encoder()(**inputs).last_hidden_state
+        
+        state = (hidden, inputs["attention_mask"])
+        self.encoder_cache.put(key, state)
+        return state
+    
+    def _stream_model_lines(self, prompt: str, profile: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream generated text from the model, yielding each completed line
+        
+        Generation runs in a background thread feeding a TextIteratorStreamer.
+        Lines shorter than min_line_length are skipped like in
+        _format_as_4_lines. Closing the iterator stops generation at the
+        next decoding step.
+        """
+        from transformers import TextIteratorStreamer
+        from stopping_criteria import EventStoppingCriteria
+        
+        inputs = self.tokenizer(
+            prompt,
+            return_tensors="pt",
+            truncation=True,
+            max_length=512
+        ).to(self.device)
+        
+        stop_event = threading.Event()
+        streamer = TextIteratorStreamer(
+            self.tokenizer,
+            skip_prompt=True,
+            skip_special_tokens=True
+        )
+        
+        # Streamers do not support beam search
+        prompt_length = 0 if self.is_seq2seq else inputs["input_ids"].shape[1]
+        kwargs = self._generation_kwargs(prompt_length, profile)
+        kwargs["num_beams"] = 1
+        kwargs["early_stopping"] = False
+        kwargs["stopping_criteria"].append(EventStoppingCriteria(stop_event))
+        if self.draft_model is not None:
+            kwargs["assistant_model"] = self.draft_model
+        
+        def run():
+            try:
+                with _rng_lock.shared(), torch.no_grad():
+                    self.model.generate(
+                        **inputs,
+                        streamer=streamer,
+                        **kwargs
+                    )
+            except Exception as e:
+                logger.error(f"Error during streaming generation: {e}")
+                streamer.end()
+        
+        worker = threading.Thread(target=run, name="poem-stream", daemon=True)
+        worker.start()
+        
+        min_length = config.POETRY_FORMAT["min_line_length"]
+        max_length = config.POETRY_FORMAT["max_line_length"]
+        buffer = ""
+        try:
+            for chunk in streamer:
+                buffer += chunk
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    line = line.strip()
+                    if len(line) >= min_length:
+                        yield line[:max_length]
+            
+            line = buffer.strip()
+            if len(line) >= min_length:
+                yield line[:max_length]
+        finally:
+            stop_event.set()
+    
+    def _decode(self, outputs) -> List[str]:
+        """Decode generated token ids in bulk"""
+        generated = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        return [text.strip() for text in generated]
+    
+    def _generate_template_based(self, theme: str, rng: Optional[random.Random] = None) -> str:
         """
         Fallback: Generate poetry using templates and mixing existing poems
         This is used when model loading fails or for faster prototyping
         """
+        rng = rng or random
         normalized_theme = self._normalize_theme(theme)
         
-        # Get theme-specific poems
-        if self.language == "bengali":
-            poems = [p for p in self.training_data.get("bengali_poems", []) 
-                    if p.get("theme") == normalized_theme]
-        else:
-            poems = [p for p in self.training_data.get("english_poems", []) 
-                    if p.get("theme") == normalized_theme]
-        
-        # If no theme-specific poems, use any poems
-        if not poems:
-            poems = (self.training_data.get("bengali_poems", []) 
-                    if self.language == "bengali" 
-                    else self.training_data.get("english_poems", []))
+        # Get theme-specific poems (or any poems if none match)
+        poems = self._get_poems(normalized_theme)
         
         if not poems:
             return self._generate_default_poem(theme)
         
         # Select a random poem and add variation
-        base_poem = random.choice(poems)
+        base_poem = rng.choice(poems)
         poem_text = base_poem["text"]
         
         # Add some variation by mixing lines (simple approach)
@@ -265,13 +1036,20 @@ class BijoyPoetryGenerator:
         else:
             result_lines = lines + self._generate_additional_lines(
                 normalized_theme, 
-                4 - len(lines)
+                4 - len(lines),
+                rng
             )
         
         return '\n'.join(result_lines)
     
-    def _generate_additional_lines(self, theme: str, count: int) -> List[str]:
+    def _generate_additional_lines(
+        self,
+        theme: str,
+        count: int,
+        rng: Optional[random.Random] = None
+    ) -> List[str]:
         """Generate additional lines to complete a 4-line poem"""
+        rng = rng or random
         templates_en = [
             f"The spirit of {theme} lives forever strong",
             f"Through {theme} we find our way",
@@ -287,7 +1065,7 @@ class BijoyPoetryGenerator:
         ]
         
         templates = templates_bn if self.language == "bengali" else templates_en
-        return random.sample(templates, min(count, len(templates)))
+        return rng.sample(templates, min(count, len(templates)))
     
     def _generate_default_poem(self, theme: str) -> str:
         """Generate a basic default poem when no data is available"""
@@ -301,8 +1079,8 @@ class BijoyPoetryGenerator:
 The {theme} of our nation great
 December's triumph we relate
 Freedom's story, never late"""
-    
-    def _format_as_4_lines(self, text: str) -> str:
+
+    def _format_as_4_lines(self, text: str, rng: Optional[random.Random] = None) -> str:
         """Ensure output is formatted as 4 lines"""
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
@@ -317,7 +1095,7 @@ Freedom's story, never late"""
         
         # Pad if we don't have 4 lines
         while len(result_lines) < 4:
-            result_lines.append(self._generate_additional_lines("victory", 1)[0])
+            result_lines.append(self._generate_additional_lines("victory", 1, rng)[0])
         
         return '\n'.join(result_lines[:4])
     
@@ -325,50 +1103,383 @@ Freedom's story, never late"""
         self, 
         theme: str, 
         language: Optional[str] = None,
-        num_outputs: int = 1
+        num_outputs: int = 1,
+        profile: Optional[str] = None,
+        deadline_ms: Optional[float] = None,
+        seed: Optional[int] = None
     ) -> List[str]:
         """
         Generate poetry based on a theme
         
         Args:
             theme: The theme for the poem (e.g., "Freedom", "Sacrifice")
-            language: Override the default language (optional)
+            language: Language for this call only (default: the generator's)
             num_outputs: Number of different poems to generate
-            
+            profile: Generation profile ("fast", "balanced", "quality");
+                default from config.DEFAULT_GENERATION_PROFILE
+            deadline_ms: Latency budget; template-based poems are returned
+                when the model cannot finish in time (optional)
+            seed: Makes the result reproducible and cacheable (optional)
+        
         Returns:
             List of generated poems (4 lines each)
         """
-        if language:
-            self.language = language.lower()
+        if language and language.lower() != self.language:
+            return self._for_language(language).generate(
+                theme, num_outputs=num_outputs, profile=profile, deadline_ms=deadline_ms, seed=seed
+            )
         
         logger.info(f"Generating {num_outputs} poem(s) for theme: {theme}")
         
-        results = []
-        for i in range(num_outputs):
-            prompt = self._get_prompt(theme)
+        items = [{"theme": theme, "num_outputs": num_outputs, "seed": seed}]
+        return self.generate_many(items, profile, deadline_ms)[0]
+    
+    def _for_language(self, language: str) -> "BijoyPoetryGenerator":
+        """
+        Get the generator serving another language, creating it on first use
+        
+        Language is per call: a shared instance never changes its own
+        language, it hands the call to a sibling that shares its result cache.
+        """
+        language = language.lower()
+        with self._siblings_lock:
+            sibling = self._siblings.get(language)
+            if sibling is None:
+                sibling = BijoyPoetryGenerator(
+                    language=language,
+                    use_gpu=self.use_gpu,
+                    result_cache=self.result_cache
+                )
+                self._siblings[language] = sibling
+            return sibling
+    
+    def generate_many(
+        self,
+        items: List[Dict],
+        profile: Optional[str] = None,
+        deadline_ms: Optional[float] = None,
+        batch_seed: Optional[int] = None
+    ) -> List[List[str]]:
+        """
+        Generate poetry for several requests with one batched model call
+        
+        Seeded requests are answered from the result cache when possible;
+        otherwise each runs in its own seeded model call so its output does
+        not depend on what else is in the batch. All unseeded requests share
+        one batched call, so large batches should leave per-item seeds out
+        and pass batch_seed instead.
+        
+        Args:
+            items: Requests as dicts with "theme" and optional "num_outputs"
+                and "seed"
+            profile: Generation profile shared by the whole batch
+            deadline_ms: Latency budget for the whole batch (optional,
+                default from config.DEADLINE_CONFIG)
+            batch_seed: Seed for the shared call of the unseeded requests;
+                reproduces their poems given the same requests in the same
+                order (optional)
+        
+        Returns:
+            One list of generated poems (4 lines each) per request, in order
+        """
+        profile = profile or config.DEFAULT_GENERATION_PROFILE
+        get_generation_profile(profile)  # Fail fast on unknown profiles
+        start = time.monotonic()
+        if deadline_ms is None:
+            deadline_ms = config.DEADLINE_CONFIG["default_ms"]
+        
+        results = [None] * len(items)
+        unseeded = []
+        seeded = []
+        for index, item in enumerate(items):
+            if item.get("seed") is None:
+                unseeded.append(index)
+                continue
+            key = self._result_cache_key(item, profile)
+            cached = self.result_cache.get(key) if self.result_cache is not None else None
+            if cached is not None:
+                results[index] = list(cached)
+            else:
+                seeded.append(index)
+        
+        groups = [(unseeded, batch_seed)] if unseeded else []
+        groups += [([index], items[index]["seed"]) for index in seeded]
+        
+        for indices, seed in groups:
+            remaining_ms = None
+            if deadline_ms is not None:
+                remaining_ms = deadline_ms - (time.monotonic() - start) * 1000
+            poems, path = self._generate_group([items[i] for i in indices], profile, remaining_ms, seed)
+            for index, item_poems in zip(indices, poems):
+                results[index] = item_poems
             
-            # Try model-based generation first, fallback to template
+            # Deadline fallbacks are not what the seed would normally produce
+            per_item_seed = items[indices[0]].get("seed") is not None
+            if per_item_seed and self.result_cache is not None and path in ("model", "template"):
+                self.result_cache.put(self._result_cache_key(items[indices[0]], profile), tuple(poems[0]))
+        
+        return results
+    
+    def _result_cache_key(self, item: Dict, profile: str) -> Tuple:
+        """Result cache key for a seeded request"""
+        return (
+            self.language,
+            self._normalize_theme(item["theme"]),
+            item["seed"],
+            item.get("num_outputs", 1),
+            profile
+        )
+    
+    def _generate_group(
+        self,
+        items: List[Dict],
+        profile: str,
+        deadline_ms: Optional[float],
+        seed: Optional[int] = None
+    ) -> Tuple[List[List[str]], str]:
+        """
+        Generate poems for a group of requests with one batched model call
+        
+        Returns:
+            (one list of poems per request, generation path used)
+        """
+        start = time.monotonic()
+        rng = random.Random(seed)
+        
+        prompts = []
+        prefixes = []
+        owners = []
+        for index, item in enumerate(items):
+            for _ in range(item.get("num_outputs", 1)):
+                prefix, suffix = self._get_prompt_parts(item["theme"], rng)
+                prompts.append(prefix + suffix)
+                prefixes.append(prefix)
+                owners.append(index)
+        
+        if not prompts:
+            return [[] for _ in items], "template"
+        
+        logger.debug(f"Batched generation: {len(items)} request(s), {len(prompts)} prompt(s)")
+        
+        # Try batched model-based generation first, fallback to template
+        generated = None
+        path = "template"
+        if deadline_ms is None or self._model_disabled():
+            generated = self._run_model_timed(prompts, prefixes, profile, seed=seed)
+        else:
+            budget = deadline_ms / 1000.0 - (time.monotonic() - start)
+            if self._model_fits_deadline(budget):
+                generated = self._run_model_timed(prompts, prefixes, profile, max_time=budget, seed=seed)
+                if generated is not None and time.monotonic() - start > deadline_ms / 1000.0:
+                    logger.warning(f"Model missed {deadline_ms:.0f} ms deadline, using template")
+                    generated = None
+                    path = "deadline_fallback"
+            else:
+                path = "deadline_skipped"
+        
+        if generated is None:
+            generated = [self._generate_template_based(items[index]["theme"], rng) for index in owners]
+        else:
+            path = "model"
+        self._record_path(path, len(prompts))
+        
+        # Format to 4 lines and hand each poem back to its request
+        results = [[] for _ in items]
+        for index, text in zip(owners, generated):
+            results[index].append(self._format_as_4_lines(text, rng))
+        return results, path
+    
+    def _run_model_timed(
+        self,
+        prompts: List[str],
+        prefixes: List[str],
+        profile: Optional[str],
+        max_time: Optional[float] = None,
+        seed: Optional[int] = None
+    ) -> Optional[List[str]]:
+        """Run batched model generation, tracking a moving average of its latency"""
+        was_loaded = self.model is not None
+        start = time.monotonic()
+        generated = self._generate_batch_with_model(prompts, prefixes, profile, max_time, seed)
+        elapsed = time.monotonic() - start
+        
+        # Calls that include model loading would skew the estimate
+        if generated is not None and was_loaded:
+            alpha = config.DEADLINE_CONFIG["ewma_alpha"]
+            with self._stats_lock:
+                if self._model_latency is None:
+                    self._model_latency = elapsed
+                else:
+                    self._model_latency = alpha * elapsed + (1 - alpha) * self._model_latency
+                self._last_model_call = time.monotonic()
+        return generated
+    
+    def _model_fits_deadline(self, budget: float) -> bool:
+        """
+        Decide whether the model path is worth trying within a time budget
+        
+        A cold model is never loaded inline under a deadline; loading starts
+        in the background and templates are served meanwhile. A loaded model
+        is skipped when its average latency exceeds the budget, except for an
+        occasional probe so the estimate can recover once load drops.
+        """
+        if budget <= 0:
+            return False
+        
+        if self.model is None:
+            with self._stats_lock:
+                start_load = not self._load_started
+                self._load_started = True
+            if start_load:
+                threading.Thread(target=self._load_model, name="model-loader", daemon=True).start()
+            return False
+        
+        if self._model_latency is None or self._model_latency <= budget:
+            return True
+        return time.monotonic() - self._last_model_call >= config.DEADLINE_CONFIG["probe_interval_s"]
+    
+    def _record_path(self, path: str, count: int):
+        """Count poems served by each generation path"""
+        with self._stats_lock:
+            self.path_counts[path] += count
+    
+    def get_stats(self) -> Dict:
+        """Get generation path counters, latency estimate and cache stats"""
+        with self._stats_lock:
+            stats = {
+                "language": self.language,
+                "model_loaded": self.model is not None,
+                "backend": self.backend.name,
+                "warm_up_seconds": self.warm_up_seconds,
+                "paths": dict(self.path_counts),
+                "speculative": self._speculative_stats(),
+                "padding": {
+                    "batches": self.padding_counts["batches"],
+                    "efficiency": (
+                        self.padding_counts["tokens"] / self.padding_counts["padded_tokens"]
+                        if self.padding_counts["padded_tokens"] else None
+                    ),
+                    "recent_batches": list(self.recent_batches)
+                },
+                "model_latency_ms": (
+                    self._model_latency * 1000 if self._model_latency is not None else None
+                )
+            }
+        stats.update(self.get_cache_stats())
+        return stats
+    
+    def _speculative_stats(self) -> Dict:
+        """Draft acceptance rate and tokens per main-model step (caller holds _stats_lock)"""
+        counts = self.speculative_counts
+        return {
+            "draft_model": self.draft_model_name,
+            "calls": counts["calls"],
+            "acceptance_rate": counts["accepted"] / counts["drafted"] if counts["drafted"] else None,
+            "tokens_per_step": counts["generated"] / counts["verify_steps"] if counts["verify_steps"] else None
+        }
+    
+    def generate_stream(
+        self,
+        theme: str,
+        language: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Generate a single poem, yielding each line as soon as it is complete
+        
+        Args:
+            theme: The theme for the poem (e.g., "Freedom", "Sacrifice")
+            language: Language for this call only (default: the generator's)
+            profile: Generation profile (beam search is not used when streaming)
+        
+        Yields:
+            The 4 lines of the poem, in order
+        """
+        if language and language.lower() != self.language:
+            yield from self._for_language(language).generate_stream(theme, profile=profile)
+            return
+        
+        logger.info(f"Streaming poem for theme: {theme}")
+        
+        self._load_model()
+        
+        lines = []
+        if self.model is not None and self.tokenizer is not None:
+            stream = self._stream_model_lines(self._get_prompt(theme), profile)
             try:
-                generated = self._generate_with_model(prompt)
+                for line in stream:
+                    lines.append(line)
+                    yield line
+                    if len(lines) >= 4:
+                        return
             except Exception as e:
-                logger.warning(f"Model generation failed: {e}, using template")
-                generated = self._generate_template_based(theme)
-            
-            # Format to 4 lines
-            formatted = self._format_as_4_lines(generated)
-            results.append(formatted)
+                logger.error(f"Error during streaming generation: {e}")
+            finally:
+                stream.close()  # Stops the generation thread
         
-        return results
+        # Nothing usable from the model: stream a template-based poem
+        if not lines:
+            generated = self._generate_template_based(theme)
+            for line in self._format_as_4_lines(generated).split('\n'):
+                yield line
+            return
+        
+        # Pad if the model stopped short of 4 lines
+        while len(lines) < 4:
+            line = self._generate_additional_lines("victory", 1)[0]
+            lines.append(line)
+            yield line
+    
+    def warm_up(self, profile: Optional[str] = None) -> float:
+        """
+        Load the model and run one throwaway generation
+        
+        The first generate call on a fresh model pays one-off costs (kernel
+        selection, allocator growth, prefix cache fill); paying them here
+        keeps them away from the first user. Warm-up output is neither
+        cached nor counted in the path stats or latency estimate.
+        
+        Args:
+            profile: Generation profile for the warm-up call
+                (default: config.PRELOAD_CONFIG["warmup_profile"])
+        
+        Returns:
+            Seconds spent loading and warming up
+        """
+        start = time.monotonic()
+        self._load_model()
+        
+        if self.model is not None:
+            prefix, suffix = self._get_prompt_parts("victory", random.Random(0))
+            self._generate_batch_with_model(
+                [prefix + suffix],
+                [prefix],
+                profile or config.PRELOAD_CONFIG["warmup_profile"]
+            )
+        
+        self.warm_up_seconds = time.monotonic() - start
+        logger.info(f"Warmed up {self.language} generator in {self.warm_up_seconds:.1f}s "
+                    f"({'model' if self.model is not None else 'templates only'})")
+        return self.warm_up_seconds
+    
+    def get_cache_stats(self) -> Dict:
+        """Get hit/miss counters for the result and model-side caches"""
+        return {
+            "result_cache": self.result_cache.stats() if self.result_cache is not None else None,
+            "prefix_cache": self.prefix_cache.stats() if self.prefix_cache is not None else None,
+            "encoder_cache": self.encoder_cache.stats() if self.encoder_cache is not None else None
+        }
     
     def get_available_themes(self) -> List[str]:
         """Get list of available themes"""
         return list(config.THEME_ALIASES.keys())
     
-    def get_random_slogan(self) -> str:
-        """Get a random Victory Day slogan"""
+    def get_random_slogan(self, seed: Optional[int] = None) -> str:
+        """Get a random Victory Day slogan (reproducible when seeded)"""
+        rng = random.Random(seed) if seed is not None else random
         slogans = self.training_data.get("slogans", [])
         if slogans:
-            return random.choice(slogans)
+            return rng.choice(slogans)
         return "জয় বাংলা! 🇧🇩"
 
 
@@ -0,0 +1,60 @@
+"""
+Custom stopping criteria for transformer generation
+Imported lazily by poetry_generator once torch/transformers are loaded
+"""
+
+import threading
+import torch
+from transformers import StoppingCriteria
+
+
+class EventStoppingCriteria(StoppingCriteria):
+    """Stop generation as soon as a threading.Event is set"""
+    
+    def __init__(self, stop_event: threading.Event):
+        self.stop_event = stop_event
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full(
+            (input_ids.shape[0],),
+            self.stop_event.is_set(),
+            dtype=torch.bool,
+            device=input_ids.device
+        )
+
+
+class LineStoppingCriteria(StoppingCriteria):
+    """
+    Stop a sequence once it contains enough complete poem lines
+    
+    A line counts when it is terminated by a newline and is at least
+    min_line_length characters long after stripping, mirroring how
+    BijoyPoetryGenerator._format_as_4_lines selects lines. Everything
+    decoded after that would be thrown away anyway.
+    """
+    
+    def __init__(self, tokenizer, prompt_length: int, num_lines: int = 4, min_line_length: int = 10):
+        """
+        Args:
+            tokenizer: Tokenizer used to decode generated tokens
+            prompt_length: Number of leading tokens that belong to the prompt
+            num_lines: Complete lines required before stopping
+            min_line_length: Minimum characters for a line to count
+        """
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.num_lines = num_lines
+        self.min_line_length = min_line_length
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        texts = self.tokenizer.batch_decode(
+            input_ids[:, self.prompt_length:],
+            skip_special_tokens=True
+        )
+        done = [self._complete_lines(text) >= self.num_lines for text in texts]
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+    
+    def _complete_lines(self, text: str) -> int:
+        """Count newline-terminated lines long enough to be kept"""
+        complete = text.split("\n")[:-1]
+        return sum(1 for line in complete if len(line.strip()) >= self.min_line_length)
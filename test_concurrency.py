@@ -0,0 +1,181 @@
+"""
+Concurrency stress test for the Bijoy Poetry Generator
+Hammers one shared generator (and the web app's generator registry) from
+many threads, as gunicorn --threads would
+Run this before enabling threaded workers
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+THREADS = int(os.environ.get("STRESS_THREADS", 16))
+REQUESTS = int(os.environ.get("STRESS_REQUESTS", 200))
+
+print("="*70)
+print("BIJOY DIBOSH POETRY GENERATOR - CONCURRENCY STRESS TEST")
+print("="*70)
+print(f"{THREADS} threads, {REQUESTS} requests per test")
+print()
+
+from poetry_generator import BijoyPoetryGenerator, ML_AVAILABLE
+
+
+def is_bengali(text):
+    """Whether a poem is written in Bengali script"""
+    return any("ঀ" <= char <= "৿" for char in text)
+
+
+def run_concurrently(func, count=REQUESTS):
+    """Call func(index) count times from THREADS threads; returns the results"""
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        return list(executor.map(func, range(count)))
+
+
+# Test 1: Per-call language on a shared generator
+# Checked on template poems, whose script reliably tells the language apart
+print("Test 1: Mixed Languages on One Shared Generator")
+print("-" * 70)
+skip_model_loading = os.environ.get("SKIP_MODEL_LOADING")
+os.environ["SKIP_MODEL_LOADING"] = "1"
+try:
+    shared = BijoyPoetryGenerator(language="english", use_gpu=False)
+    
+    def mixed_language(index):
+        language = "bengali" if index % 2 else "english"
+        poems = shared.generate(theme="Freedom", language=language)
+        return language, poems[0]
+    
+    wrong = [
+        (language, poem) for language, poem in run_concurrently(mixed_language)
+        if is_bengali(poem) != (language == "bengali")
+    ]
+    if wrong:
+        print(f"✗ {len(wrong)} poem(s) came back in the wrong language")
+        sys.exit(1)
+    if shared.language != "english":
+        print(f"✗ Shared generator's language changed to {shared.language}")
+        sys.exit(1)
+    print("✓ Every poem matched its requested language")
+    print("✓ Shared generator kept its own language")
+except Exception as e:
+    print(f"✗ Mixed-language test failed: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+finally:
+    if skip_model_loading is None:
+        del os.environ["SKIP_MODEL_LOADING"]
+print()
+
+# Test 2: Seeded requests stay reproducible under contention
+# Result cache off, so every seeded call really generates; unseeded calls
+# run alongside and draw from the same torch RNG
+print("Test 2: Seeded Reproducibility Under Contention")
+print("-" * 70)
+try:
+    seeded = BijoyPoetryGenerator(language="english", use_gpu=False)
+    seeded.result_cache = None
+    expected = {seed: seeded.generate(theme="Victory", seed=seed) for seed in range(8)}
+    if seeded.model is None:
+        print("ℹ No model loaded - checking template-based generation only")
+    
+    def seeded_or_not(index):
+        if index % 2:
+            seeded.generate(theme="Freedom")
+            return None
+        seed = index // 2 % 8
+        return seed, seeded.generate(theme="Victory", seed=seed)
+    
+    results = [result for result in run_concurrently(seeded_or_not) if result is not None]
+    mismatches = sum(1 for seed, poems in results if poems != expected[seed])
+    if mismatches:
+        print(f"✗ {mismatches} of {len(results)} seeded result(s) differed from a single-threaded run")
+        sys.exit(1)
+    print(f"✓ {len(results)} seeded results identical to single-threaded runs despite unseeded load")
+except Exception as e:
+    print(f"✗ Seeded reproducibility test failed: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+print()
+
+# Test 3: Model loading happens once
+print("Test 3: Idempotent Model Loading")
+print("-" * 70)
+if not ML_AVAILABLE or os.environ.get("SKIP_MODEL_LOADING") or os.environ.get("RENDER"):
+    print("ℹ Model loading disabled - skipped")
+else:
+    try:
+        fresh = BijoyPoetryGenerator(language="english", use_gpu=False)
+        load_calls = []
+        load_model_locked = fresh._load_model_locked
+        
+        def counting_load():
+            load_calls.append(threading.current_thread().name)
+            load_model_locked()
+        
+        fresh._load_model_locked = counting_load
+        barrier = threading.Barrier(THREADS)
+        
+        def load(index):
+            barrier.wait()
+            fresh._load_model()
+            return fresh.model is not None
+        
+        loaded = run_concurrently(load, THREADS)
+        if len(load_calls) != 1:
+            print(f"✗ Model was loaded {len(load_calls)} times")
+            sys.exit(1)
+        print(f"✓ Model loaded once for {THREADS} concurrent callers (loaded: {all(loaded)})")
+    except Exception as e:
+        print(f"✗ Model loading test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+print()
+
+# Test 4: Web app creates one generator per language
+print("Test 4: Web App Generator Registry")
+print("-" * 70)
+try:
+    import app
+except ImportError as e:
+    print(f"ℹ Web app unavailable ({e}) - skipped")
+else:
+    try:
+        barrier = threading.Barrier(THREADS)
+        
+        def get_generator(index):
+            barrier.wait()
+            return app.get_generator("bengali" if index % 2 else "english")
+        
+        instances = {id(generator) for generator in run_concurrently(get_generator, THREADS)}
+        if len(instances) != 2:
+            print(f"✗ {len(instances)} generator instance(s) created for 2 languages")
+            sys.exit(1)
+        print("✓ Exactly one generator per language")
+        
+        client = app.app.test_client()
+        statuses = run_concurrently(
+            lambda index: client.post('/api/generate', json={
+                'theme': 'Unity',
+                'language': 'bengali' if index % 2 else 'english'
+            }).status_code
+        )
+        failed = [status for status in statuses if status != 200]
+        if failed:
+            print(f"✗ {len(failed)} /api/generate request(s) failed")
+            sys.exit(1)
+        print(f"✓ {len(statuses)} concurrent /api/generate requests succeeded")
+    except Exception as e:
+        print(f"✗ Web app test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+print()
+
+print("="*70)
+print("✓ All concurrency tests passed!")
+print("="*70)
@@ -102,7 +102,7 @@ try:
     print("Testing Bengali generator...")
     gen_bn = BijoyPoetryGenerator(language="bengali", use_gpu=False)
     print("✓ Bengali generator initialized")
-    
+
 except Exception as e:
     print(f"✗ Generator initialization failed: {e}")
     import traceback
@@ -129,7 +129,7 @@ try:
     for line in poems_bn[0].split('\n'):
         print(f"  {line}")
     print()
-    
+
 except Exception as e:
     print(f"✗ Generation failed: {e}")
     import traceback
@@ -145,7 +145,7 @@ try:
     
     slogan = gen_en.get_random_slogan()
     print(f"✓ Random slogan: {slogan}")
-    
+
 except Exception as e:
     print(f"✗ Themes/slogans test failed: {e}")
     sys.exit(1)
@@ -166,6 +166,136 @@ except Exception as e:
     print(f"ℹ Could not check GPU: {e}")
 print()
 
+# Test 9: Result cache backends
+print("Test 9: Result Cache Backends")
+print("-" * 70)
+try:
+    import tempfile
+    import threading
+    import time
+    from cache_backends import (
+        KeyValueCacheBackend, LocalKeyValueStore, MemoryCacheBackend, SQLiteCacheBackend
+    )
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.sqlite3")
+        
+        # Every backend drops entries once their TTL has passed
+        expiring = {
+            "memory": MemoryCacheBackend(ttl=1),
+            "sqlite": SQLiteCacheBackend(os.path.join(tmp, "ttl.sqlite3"), ttl=1),
+            "kv": KeyValueCacheBackend(LocalKeyValueStore(), ttl=1),
+        }
+        for cache in expiring.values():
+            cache.put(("english", "Freedom"), ["poem"])
+            assert cache.get(("english", "Freedom")) == ["poem"], f"{cache.name}: fresh entry missing"
+        time.sleep(1.2)
+        for cache in expiring.values():
+            assert cache.get(("english", "Freedom")) is None, f"{cache.name}: expired entry returned"
+        print("✓ memory, sqlite and kv entries expire after their TTL")
+        
+        # Pruning keeps the most recently used entries under the size cap
+        capped = {
+            "memory": MemoryCacheBackend(max_entries=3),
+            "sqlite": SQLiteCacheBackend(path, max_entries=3),
+        }
+        capped["sqlite"].PRUNE_EVERY = 1
+        capped["sqlite"].ACCESS_UPDATE_S = 0
+        for cache in capped.values():
+            for key in ("a", "b", "c"):
+                cache.put(key, key)
+                time.sleep(0.01)
+            cache.get("a")
+            time.sleep(0.01)
+            cache.put("d", "d")
+            kept = [key for key in ("a", "b", "c", "d") if cache.get(key) is not None]
+            assert kept == ["a", "c", "d"], f"{cache.name}: kept {kept}"
+        print("✓ memory and sqlite evict the least recently used entry above max_entries")
+        
+        # Separate instances (as in separate workers) share one SQLite file
+        writer = SQLiteCacheBackend(path)
+        reader = SQLiteCacheBackend(path)
+        writer.put(("bengali", "বিজয়"), ["কবিতা"])
+        assert reader.get(("bengali", "বিজয়")) == ["কবিতা"], "second connection missed a write"
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(reader.get(("bengali", "বিজয়"))))
+        thread.start()
+        thread.join()
+        assert seen == [["কবিতা"]], "other thread's connection missed a write"
+        reader.put("from-reader", 1)
+        assert writer.get("from-reader") == 1, "first connection missed a write"
+        print("✓ Two SQLite connections see each other's writes")
+
+except Exception as e:
+    print(f"✗ Result cache backend test failed: {e}")
+    sys.exit(1)
+print()
+
+# Test 10: Length bucketing, byte-capped cache and job chunk publishing
+print("Test 10: Batching Helpers")
+print("-" * 70)
+try:
+    from caching import LRUCache
+    from cache_backends import KeyValueCacheBackend, LocalKeyValueStore
+    from jobs import Job, JobManager
+    from poetry_generator import _bucket_groups
+    
+    buckets = [32, 48, 64, 80, 96]
+    groups = _bucket_groups([10] * 4 + [40] * 4 + [90], buckets, 4)
+    assert groups == [(32, [0, 1, 2, 3]), (96, [4, 5, 6, 7, 8])], groups
+    groups = _bucket_groups([10] * 5 + [40] * 2, buckets, 4)
+    assert groups == [(48, [0, 1, 2, 3, 4, 5, 6])], groups
+    groups = _bucket_groups([10, 10], buckets, 4)
+    assert groups == [(32, [0, 1])], groups
+    groups = _bucket_groups([10, 50, 50, 50, 50], buckets, 2)
+    assert groups == [(64, [0, 1, 2, 3, 4])], groups
+    print("✓ Undersized bucket groups carry up; leftovers join the largest bucket")
+    
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.get("a")
+    cache.put("c", "xxxx")
+    assert cache.get("b") is None and cache.get("a") == "xxxx" and cache.get("c") == "xxxx", "wrong entry evicted"
+    assert cache.total_bytes == 8, cache.total_bytes
+    assert cache.put("d", "x" * 11) is False, "oversized value was stored"
+    assert "a" in cache and "c" in cache, "oversized value evicted entries"
+    print("✓ LRU cache evicts least recently used entries above max_bytes")
+    
+    class FakeGenerator:
+        def generate_many(self, items, profile=None):
+            return [[f"{item['theme']} poem"] * item["num_outputs"] for item in items]
+    
+    class RecordingStore(KeyValueCacheBackend):
+        def __init__(self):
+            super().__init__(LocalKeyValueStore())
+            self.published = []
+        
+        def put(self, key, value):
+            self.published.append(value["completed"])
+            return super().put(key, value)
+    
+    store = RecordingStore()
+    manager = JobManager(lambda language: FakeGenerator(), workers=1, max_queued=1, chunk_size=2, store=store)
+    items = [
+        {"theme": f"Theme {index}", "language": "english", "num_outputs": 1, "seed": None}
+        for index in range(5)
+    ]
+    job = Job(items)
+    manager._process(job)
+    assert store.published == [0, 2, 4, 5], store.published
+    
+    # Another worker process only sees the job through the shared store
+    other = JobManager(lambda language: FakeGenerator(), store=store)
+    state = other.status(job.id)
+    assert state["completed"] == 5 and state["results"][4]["poems"] == ["Theme 4 poem"], state
+    print("✓ Jobs publish their progress to the shared store after every chunk")
+    
+except Exception as e:
+    print(f"✗ Batching helper test failed: {e}")
+    sys.exit(1)
+print()
+
 # Final summary
 print("="*70)
 print("TEST SUMMARY")
@@ -0,0 +1,115 @@
+"""
+Request validation for the Bijoy Dibosh Poetry Generator web front ends
+Shared by the Flask app (app.py) and the ASGI app (asgi.py)
+"""
+
+from typing import Dict, List, Optional
+import config
+
+LANGUAGES = ["english", "bengali"]
+
+
+class ValidationError(ValueError):
+    """Invalid request parameters (answered with HTTP 400)"""
+
+
+def validate_profile(data: Dict) -> str:
+    """Get the generation profile, defaulting to DEFAULT_GENERATION_PROFILE"""
+    profile = data.get('profile', config.DEFAULT_GENERATION_PROFILE)
+    if profile not in config.GENERATION_PROFILES:
+        raise ValidationError('Invalid profile')
+    return profile
+
+
+def validate_deadline(data: Dict) -> Optional[float]:
+    """Get the optional latency budget in milliseconds"""
+    deadline_ms = data.get('deadline_ms')
+    if deadline_ms is None:
+        return None
+    try:
+        deadline_ms = float(deadline_ms)
+    except (TypeError, ValueError):
+        raise ValidationError('deadline_ms must be a number')
+    if deadline_ms <= 0 or deadline_ms > config.DEADLINE_CONFIG['max_ms']:
+        raise ValidationError(f"deadline_ms must be between 0 and {config.DEADLINE_CONFIG['max_ms']}")
+    return deadline_ms
+
+
+def validate_batch_seed(data: Dict) -> Optional[int]:
+    """Get the optional seed shared by a batch's unseeded items"""
+    seed = data.get('seed')
+    if seed is None:
+        return None
+    try:
+        return int(seed)
+    except (TypeError, ValueError):
+        raise ValidationError('seed must be an integer')
+
+
+def validate_item(data: Dict, max_outputs: int = 5) -> Dict:
+    """
+    Validate one generation request (theme, language, num_outputs, seed)
+    
+    Returns:
+        Dict with the cleaned theme, language, num_outputs and seed
+    """
+    if not isinstance(data, dict):
+        raise ValidationError('Item must be an object')
+    
+    theme = str(data.get('theme', '')).strip()
+    if not theme:
+        raise ValidationError('Theme is required')
+    
+    language = str(data.get('language', 'english')).lower()
+    if language not in LANGUAGES:
+        raise ValidationError('Invalid language')
+    
+    try:
+        num_outputs = int(data.get('num_outputs', 1))
+        seed = int(data['seed']) if data.get('seed') is not None else None
+    except (TypeError, ValueError):
+        raise ValidationError('num_outputs and seed must be integers')
+    if num_outputs < 1 or num_outputs > max_outputs:
+        raise ValidationError(f'num_outputs must be between 1 and {max_outputs}')
+    
+    return {'theme': theme, 'language': language, 'num_outputs': num_outputs, 'seed': seed}
+
+
+def validate_generate_request(data: Dict) -> Dict:
+    """Validate an /api/generate body: one item plus profile and deadline_ms"""
+    if not data:
+        raise ValidationError('No data provided')
+    params = validate_item(data)
+    params['profile'] = validate_profile(data)
+    params['deadline_ms'] = validate_deadline(data)
+    return params
+
+
+def validate_stream_request(data: Dict) -> Dict:
+    """Validate an /api/generate/stream body or query string"""
+    if not isinstance(data, dict):
+        raise ValidationError('Request body must be a JSON object')
+    
+    theme = str(data.get('theme', '')).strip()
+    if not theme:
+        raise ValidationError('Theme is required')
+    
+    language = str(data.get('language', 'english')).lower()
+    if language not in LANGUAGES:
+        raise ValidationError('Invalid language')
+    
+    return {'theme': theme, 'language': language, 'profile': validate_profile(data)}
+
+
+def validate_items(data: Dict, max_items: int, kind: str = 'batch') -> List:
+    """Check that a bulk request carries a non-empty list of at most max_items items"""
+    if not data:
+        raise ValidationError('No data provided')
+    if not isinstance(data, dict):
+        raise ValidationError('Request body must be a JSON object')
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        raise ValidationError('items must be a non-empty list')
+    if len(items) > max_items:
+        raise ValidationError(f'At most {max_items} items per {kind}')
+    return items